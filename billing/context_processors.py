@@ -1,4 +1,4 @@
-from .services import user_has_pomodoro_access, user_has_ai_chat_access
+from .services import user_active_plan_types
 
 
 def subscription_context(request):
@@ -9,9 +9,10 @@ def subscription_context(request):
     }
     
     if request.user.is_authenticated:
+        plan_types = user_active_plan_types(request.user)
         context.update({
-            'has_pomodoro_subscription': user_has_pomodoro_access(request.user),
-            'has_ai_chat_subscription': user_has_ai_chat_access(request.user),
+            'has_pomodoro_subscription': 'pomodoro' in plan_types,
+            'has_ai_chat_subscription': 'ai_chat' in plan_types,
         })
     
     return context
@@ -2,6 +2,7 @@ import stripe
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.urls import reverse
+from django.utils import timezone
 from datetime import datetime
 from .models import Customer, Subscription, SubscriptionPlan
 import logging
@@ -157,6 +158,18 @@ def user_has_subscription(user, plan_type):
         return False
 
 
+def user_active_plan_types(user):
+    """Return the plan types the user has an active subscription for, in one query."""
+    if not user.is_authenticated:
+        return set()
+    
+    return set(Subscription.objects.filter(
+        user=user,
+        status__in=['active', 'trialing'],
+        current_period_end__gt=timezone.now()
+    ).values_list('plan__plan_type', flat=True))
+
+
 def user_has_pomodoro_access(user):
     """Check if user has access to Pomodoro features."""
     return user_has_subscription(user, 'pomodoro')
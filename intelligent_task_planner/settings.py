@@ -107,6 +107,14 @@ DATABASES = {
     }
 }
 
+# Cache
+# Shared between web workers and the Django-Q2 cluster, so background job
+# status is visible to the request that enqueued it. Use e.g.
+# CACHE_URL=dbcache://planner_cache or redis://... in production.
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -0,0 +1,52 @@
+"""
+Per-user cache versioning for schedule-derived data.
+
+Cached views embed the user's current schedule version in their keys. The
+version is replaced whenever a Task or TimeBlock changes (see the signal
+handlers in models.py), so stale entries are never read again and simply
+expire. Writes that bypass signals (bulk_create, bulk_update, QuerySet.update)
+must call bump_schedule_version themselves.
+
+Versions only line up across processes when every web worker and the
+Django-Q2 cluster share one cache backend. With the process-local default, a
+bump in one worker is invisible to the others, so callers check
+cache_is_shared() before serving anything keyed by a schedule version.
+"""
+
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+
+GOOGLE_TOKEN_TIMEOUT = 60
+SYNC_STATUS_CACHE_TIMEOUT = 30
+
+
+def cache_is_shared() -> bool:
+    """True if the default cache is visible to every process, not just this one."""
+    backend = settings.CACHES['default']['BACKEND']
+    return not backend.endswith(('LocMemCache', 'DummyCache'))
+
+
+def _schedule_version_key(user_id: int) -> str:
+    return f'schedule_version:{user_id}'
+
+
+def get_schedule_version(user_id: int) -> str:
+    """Return the current schedule version token for a user."""
+    return cache.get_or_set(_schedule_version_key(user_id), lambda: uuid4().hex, None)
+
+
+def bump_schedule_version(user_id: int) -> None:
+    """Invalidate every cache entry built from the user's tasks and time blocks."""
+    cache.set(_schedule_version_key(user_id), uuid4().hex, None)
+
+
+def google_token_key(user_id: int) -> str:
+    """Cache key holding whether the user has a Google OAuth token; cleared by SocialToken signals."""
+    return f'has_google_token:{user_id}'
+
+
+def sync_status_key(user_id: int) -> str:
+    """Cache key holding the sync_status response; cleared when sync logs or settings change."""
+    return f'sync_status:{user_id}'
@@ -9,7 +9,7 @@ from datetime import datetime, timedelta
 import json
 import logging
 
-from .models import Task
+from .models import GoogleCalendarIntegration, Task
 from .services.google_calendar_service import GoogleCalendarService
 
 logger = logging.getLogger(__name__)
@@ -42,39 +42,37 @@ def manual_schedule_task(request):
             )
         
         # Get the task
-        task = get_object_or_404(Task, id=task_id, user=request.user)
+        task = get_object_or_404(Task.objects.for_user(request.user), id=task_id)
         
         # Calculate end time based on estimated hours
         estimated_hours = float(task.estimated_hours or 1.0)
         end_datetime = start_datetime + timedelta(hours=estimated_hours)
         
-        # Check for conflicts
-        conflicting_tasks = Task.objects.filter(
-            user=request.user,
+        # Check for conflicts; only the titles are needed for the message
+        conflicting_titles = list(Task.objects.for_user(request.user).filter(
             start_time__lt=end_datetime,
             end_time__gt=start_datetime
-        ).exclude(id=task.id)
+        ).exclude(id=task.id).values_list('title', flat=True))
         
-        if conflicting_tasks.exists():
+        if conflicting_titles:
             return JsonResponse({
                 'success': False,
-                'error': f'Time slot conflicts with: {", ".join([t.title for t in conflicting_tasks])}'
+                'error': f'Time slot conflicts with: {", ".join(conflicting_titles)}'
             })
         
         # Update task with new schedule
         with transaction.atomic():
             task.start_time = start_datetime
             task.end_time = end_datetime
-            task.save()
+            task.save(update_fields=['start_time', 'end_time', 'updated_at'])
             
             # Sync to Google Calendar if enabled
             try:
-                service = GoogleCalendarService(request.user)
-                # Check if service has Google integration
-                from .models import GoogleCalendarIntegration
-                integration = GoogleCalendarIntegration.objects.filter(user=request.user).first()
-                if integration and integration.is_enabled and service.service:
-                    service.sync_task_to_google(task)
+                # Check for an enabled integration before building the API client
+                if GoogleCalendarIntegration.objects.filter(user=request.user, is_enabled=True).exists():
+                    service = GoogleCalendarService(request.user)
+                    if service.service:
+                        service.sync_task_to_google(task)
             except Exception as e:
                 logger.warning(f"Google Calendar sync failed: {e}")
         
@@ -162,12 +160,11 @@ def create_and_schedule_task(request):
             
             # Sync to Google Calendar if enabled
             try:
-                service = GoogleCalendarService(request.user)
-                # Check if service has Google integration
-                from .models import GoogleCalendarIntegration
-                integration = GoogleCalendarIntegration.objects.filter(user=request.user).first()
-                if integration and integration.is_enabled and service.service:
-                    service.sync_task_to_google(task)
+                # Check for an enabled integration before building the API client
+                if GoogleCalendarIntegration.objects.filter(user=request.user, is_enabled=True).exists():
+                    service = GoogleCalendarService(request.user)
+                    if service.service:
+                        service.sync_task_to_google(task)
             except Exception as e:
                 logger.warning(f"Google Calendar sync failed: {e}")
         
@@ -199,7 +196,7 @@ def unschedule_task(request):
         data = json.loads(request.body)
         task_id = data.get('task_id')
         
-        task = get_object_or_404(Task, id=task_id, user=request.user)
+        task = get_object_or_404(Task.objects.for_user(request.user), id=task_id)
         
         with transaction.atomic():
             # Store Google Calendar event ID before clearing
@@ -207,7 +204,7 @@ def unschedule_task(request):
             
             task.start_time = None
             task.end_time = None
-            task.save()
+            task.save(update_fields=['start_time', 'end_time', 'updated_at'])
             
             # Remove from Google Calendar if it was synced
             if google_event_id:
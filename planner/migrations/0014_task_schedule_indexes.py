@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-16 18:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0013_populate_completed_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'status', 'start_time'], name='planner_tas_user_id_16cec1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'start_time', 'status', 'deadline'], name='planner_tas_user_id_0a22b8_idx'),
+        ),
+    ]
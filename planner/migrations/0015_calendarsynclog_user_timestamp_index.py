@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-16 19:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0014_task_schedule_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='calendarsynclog',
+            index=models.Index(fields=['user', '-timestamp'], name='calsynclog_user_ts_idx'),
+        ),
+    ]
@@ -1,11 +1,21 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.core.cache import cache
 from django.utils import timezone
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
 from datetime import timedelta, date
 from django.db.models import Count, Q
+from allauth.socialaccount.models import SocialToken
+
+from .caching import bump_schedule_version, google_token_key, sync_status_key
+
+
+class TaskQuerySet(models.QuerySet):
+    def for_user(self, user):
+        """Tasks owned by user; the base queryset for every per-user view."""
+        return self.filter(user=user)
 
 
 class Task(models.Model):
@@ -28,6 +38,19 @@ class Task(models.Model):
         ('google_calendar', 'Google Calendar'),
     ]
 
+    # Columns rendered by partials/task_card.html, for use with .only().
+    # user is included because user.tasks querysets set it on every row.
+    CARD_FIELDS = (
+        'id', 'user', 'title', 'description', 'status', 'priority', 'deadline',
+        'estimated_hours', 'start_time', 'end_time', 'is_locked', 'updated_at',
+    )
+    # Columns rendered by calendar.html
+    CALENDAR_FIELDS = CARD_FIELDS + ('created_at',)
+    # Columns rendered by task_list.html
+    LIST_FIELDS = CARD_FIELDS + ('actual_hours',)
+    # Columns read by the scheduling engine and task reminders
+    SCHEDULING_FIELDS = CARD_FIELDS + ('min_block_size',)
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tasks')
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
@@ -46,12 +69,16 @@ class Task(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TaskQuerySet.as_manager()
+
     class Meta:
         ordering = ['deadline', 'priority']
         indexes = [
             models.Index(fields=['user', 'source']),
             models.Index(fields=['user', 'external_id']),
             models.Index(fields=['user', 'status', 'deadline']),
+            models.Index(fields=['user', 'status', 'start_time']),
+            models.Index(fields=['user', 'start_time', 'status', 'deadline']),
         ]
 
     def __str__(self):
@@ -221,40 +248,57 @@ class OptimizationHistory(models.Model):
     
     def create_task_snapshot(self, user):
         """Create a snapshot of current task scheduling state."""
-        tasks_data = []
-        for task in user.tasks.filter(status__in=['todo', 'in_progress']):
-            tasks_data.append({
-                'id': task.id,
-                'start_time': task.start_time.isoformat() if task.start_time else None,
-                'end_time': task.end_time.isoformat() if task.end_time else None,
-                'is_locked': task.is_locked,
-                'status': task.status,
-            })
-        return tasks_data
+        rows = user.tasks.filter(status__in=['todo', 'in_progress']).values_list(
+            'id', 'start_time', 'end_time', 'is_locked', 'status'
+        )
+        return [
+            {
+                'id': task_id,
+                'start_time': start_time.isoformat() if start_time else None,
+                'end_time': end_time.isoformat() if end_time else None,
+                'is_locked': is_locked,
+                'status': status,
+            }
+            for task_id, start_time, end_time, is_locked, status in rows
+        ]
     
     def restore_task_state(self):
         """Restore tasks to their previous state (undo optimization)."""
-        for task_data in self.previous_task_state:
-            try:
-                task = Task.objects.get(id=task_data['id'], user=self.user)
-                
-                # Restore scheduling state
-                if task_data['start_time']:
-                    task.start_time = timezone.datetime.fromisoformat(task_data['start_time'])
-                else:
-                    task.start_time = None
-                    
-                if task_data['end_time']:
-                    task.end_time = timezone.datetime.fromisoformat(task_data['end_time'])
-                else:
-                    task.end_time = None
-                
-                task.is_locked = task_data['is_locked']
-                task.status = task_data['status']
-                task.save()
-                
-            except Task.DoesNotExist:
-                continue  # Task was deleted, skip
+        from django.db import transaction
+        from django_q.tasks import async_task
+        
+        snapshot = {task_data['id']: task_data for task_data in self.previous_task_state}
+        
+        # Tasks deleted since the snapshot are skipped
+        existing_ids = self.user.tasks.filter(id__in=snapshot).values_list('id', flat=True)
+        
+        now = timezone.now()
+        tasks = []
+        for task_id in existing_ids:
+            task_data = snapshot[task_id]
+            tasks.append(Task(
+                id=task_id,
+                start_time=timezone.datetime.fromisoformat(task_data['start_time']) if task_data['start_time'] else None,
+                end_time=timezone.datetime.fromisoformat(task_data['end_time']) if task_data['end_time'] else None,
+                is_locked=task_data['is_locked'],
+                status=task_data['status'],
+                updated_at=now,
+            ))
+        
+        # bulk_update skips the Task save signals, so redo their work here
+        with transaction.atomic():
+            Task.objects.bulk_update(
+                tasks, ['start_time', 'end_time', 'is_locked', 'status', 'updated_at'], batch_size=500
+            )
+            TaskNotification.objects.filter(
+                task_id__in=[task.id for task in tasks],
+                status='pending'
+            ).update(status='cancelled')
+        bump_schedule_version(self.user_id)
+        
+        for task in tasks:
+            if task.start_time:
+                async_task('planner.services.notification_service.refresh_task_reminders', task.id)
         
         return True
 
@@ -400,6 +444,15 @@ def handle_task_pre_save(sender, instance, **kwargs):
             pass
 
 
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(post_save, sender=TimeBlock)
+@receiver(post_delete, sender=TimeBlock)
+def invalidate_schedule_cache(sender, instance, **kwargs):
+    """Expire cached schedule views whenever a task or time block changes."""
+    bump_schedule_version(instance.user_id)
+
+
 @receiver(post_save, sender=User)
 def create_notification_preferences(sender, instance, created, **kwargs):
     """Create notification preferences for new users."""
@@ -407,6 +460,13 @@ def create_notification_preferences(sender, instance, created, **kwargs):
         NotificationPreference.objects.create(user=instance)
 
 
+@receiver(post_save, sender=SocialToken)
+@receiver(post_delete, sender=SocialToken)
+def invalidate_google_token_cache(sender, instance, **kwargs):
+    """Forget the cached token check when a user's OAuth token is stored or removed."""
+    cache.delete(google_token_key(instance.account.user_id))
+
+
 # Signal to handle Google social account connection
 from allauth.socialaccount.signals import social_account_added
 
@@ -530,11 +590,22 @@ class CalendarSyncLog(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['user', '-timestamp'], name='calsynclog_user_ts_idx'),
+        ]
 
     def __str__(self):
         return f"{self.get_sync_type_display()} - {self.status} ({self.timestamp})"
 
 
+@receiver(post_save, sender=CalendarSyncLog)
+@receiver(post_save, sender=GoogleCalendarIntegration)
+@receiver(post_delete, sender=GoogleCalendarIntegration)
+def invalidate_sync_status_cache(sender, instance, **kwargs):
+    """Expire the cached sync_status response when a sync runs or settings change."""
+    cache.delete(sync_status_key(instance.user_id))
+
+
 class SyncLock(models.Model):
     """Database-based sync lock to prevent concurrent Google Calendar syncs."""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='sync_lock')
@@ -545,30 +616,27 @@ class SyncLock(models.Model):
         db_table = 'planner_sync_lock'
     
     @classmethod
-    def acquire_lock(cls, user, timeout_minutes=5):
+    def acquire_lock(cls, user, timeout_minutes=5, process_id=''):
         """
         Try to acquire a sync lock for the user.
-        Returns (success, lock_instance) tuple.
+        Returns (success, lock_instance) tuple; on failure lock_instance is
+        the lock currently held, or None if it was released meanwhile.
         """
-        from django.db import transaction
+        from django.db import IntegrityError, transaction
         
         try:
-            with transaction.atomic():
-                # Clean up expired locks first
-                cutoff_time = timezone.now() - timedelta(minutes=timeout_minutes)
-                cls.objects.filter(locked_at__lt=cutoff_time).delete()
-                
-                # Try to create a new lock
-                lock, created = cls.objects.get_or_create(
-                    user=user,
-                    defaults={'locked_at': timezone.now()}
-                )
-                
-                if created:
-                    return True, lock
-                else:
-                    # Lock already exists and hasn't expired
-                    return False, lock
+            # Clean up this user's lock if it has expired
+            cutoff_time = timezone.now() - timedelta(minutes=timeout_minutes)
+            cls.objects.filter(user=user, locked_at__lt=cutoff_time).delete()
+            
+            # The unique user column makes the INSERT itself the atomic test-and-set
+            try:
+                with transaction.atomic():
+                    lock = cls.objects.create(user=user, process_id=process_id)
+                return True, lock
+            except IntegrityError:
+                # Lock already exists and hasn't expired
+                return False, cls.objects.filter(user=user).first()
                     
         except Exception:
             # If there's any database error, allow the operation
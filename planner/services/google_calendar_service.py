@@ -3,23 +3,42 @@ Google Calendar API service for syncing tasks with Google Calendar.
 """
 import logging
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import List, Dict, Tuple, Optional
 from django.conf import settings
+from django.db import transaction
+from django.core.cache import cache
 from django.utils import timezone
 from django.contrib.auth.models import User
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
 from googleapiclient.errors import HttpError
 from allauth.socialaccount.models import SocialToken
-from ..models import Task, GoogleCalendarIntegration, GoogleCalendarEvent, CalendarSyncLog
+from ..models import Task, GoogleCalendarIntegration, GoogleCalendarEvent, CalendarSyncLog, SyncLock
 
 logger = logging.getLogger(__name__)
 
+SYNC_STATUS_TIMEOUT = 60 * 15
+MAX_REPORTED_ERRORS = 20
+
+
+@lru_cache(maxsize=None)
+def _calendar_discovery_document() -> str:
+    """The Calendar v3 discovery document bundled with the client, read once per process."""
+    return discovery_cache.get_static_doc('calendar', 'v3')
+
+
+def sync_job_status_key(user_id: int, job_id: str) -> str:
+    """Cache key holding the state and result of one background Google sync."""
+    return f'google_sync:{user_id}:{job_id}'
+
 
 class GoogleCalendarService:
     """Service class for Google Calendar API operations."""
     
     SCOPES = ['https://www.googleapis.com/auth/calendar']
+    BATCH_SIZE = 50  # Google's recommended maximum calls per batch request
     
     def __init__(self, user: User):
         self.user = user
@@ -48,8 +67,8 @@ class GoogleCalendarService:
                 scopes=self.SCOPES
             )
             
-            # Build service
-            self.service = build('calendar', 'v3', credentials=credentials)
+            # Build service; the instance keeps one authorized HTTP client for all calls
+            self.service = build_from_document(_calendar_discovery_document(), credentials=credentials)
             
         except Exception as e:
             logger.error(f"Failed to initialize Google Calendar service for user {self.user.id}: {e}")
@@ -263,6 +282,197 @@ class GoogleCalendarService:
             logger.error(f"Google Calendar import failed: {e}")
             raise
     
+    def full_sync(self, start_date: datetime = None, end_date: datetime = None) -> Dict:
+        """
+        Two-way sync in one pass: push scheduled tasks using batched API calls,
+        then import the calendar window, skipping the events just pushed.
+        """
+        if not self.service:
+            raise ValueError("Google Calendar service not initialized")
+        
+        if not start_date:
+            start_date = timezone.now()
+        if not end_date:
+            end_date = start_date + timedelta(days=30)
+        
+        sync_log = CalendarSyncLog.objects.create(
+            user=self.user,
+            sync_type='manual',
+            status='failed'
+        )
+        start_time = timezone.now()
+        
+        try:
+            # Only ask Google for the primary calendar when there is no integration yet
+            integration = GoogleCalendarIntegration.objects.filter(user=self.user).first()
+            if integration is None:
+                integration = GoogleCalendarIntegration.objects.create(
+                    user=self.user,
+                    google_calendar_id=self.get_primary_calendar()
+                )
+            calendar_id = integration.google_calendar_id
+            
+            tasks = list(Task.objects.filter(
+                user=self.user,
+                start_time__isnull=False,
+                status__in=['todo', 'in_progress']
+            ))
+            to_google, pushed_event_ids = self._push_tasks_batched(tasks, calendar_id)
+            from_google = self._pull_events(calendar_id, start_date, end_date, skip_event_ids=pushed_event_ids)
+            
+            errors = to_google['errors'] + from_google['errors']
+            events_created = to_google['events_created'] + from_google['events_created']
+            events_updated = to_google['events_updated'] + from_google['events_updated']
+            
+            # Update sync log
+            sync_log.status = 'success' if not errors else 'partial'
+            sync_log.events_created = events_created
+            sync_log.events_updated = events_updated
+            sync_log.events_synced = events_created + events_updated
+            sync_log.error_message = '; '.join(errors) if errors else ''
+            sync_log.sync_duration = timezone.now() - start_time
+            sync_log.save()
+            
+            # Update integration last sync time
+            integration.last_sync = timezone.now()
+            integration.save()
+            
+            return {
+                'success': True,
+                'to_google': to_google,
+                'from_google': from_google,
+            }
+            
+        except Exception as e:
+            sync_log.error_message = str(e)
+            sync_log.sync_duration = timezone.now() - start_time
+            sync_log.save()
+            logger.error(f"Google Calendar full sync failed: {e}")
+            raise
+    
+    def _push_tasks_batched(self, tasks: List[Task], calendar_id: str) -> Tuple[Dict, set]:
+        """
+        Create or update an event for each task, BATCH_SIZE API calls per HTTP
+        request. Returns the result counts and the ids of the events written.
+        """
+        tasks_by_id = {task.id: task for task in tasks}
+        links = {link.task_id: link for link in GoogleCalendarEvent.objects.filter(task__in=tasks)}
+        
+        result = {'success': True, 'events_created': 0, 'events_updated': 0, 'errors': []}
+        pushed_event_ids = set()
+        new_links = []
+        changed_links = []
+        now = timezone.now()
+        
+        def handle_response(request_id, response, exception):
+            task = tasks_by_id[int(request_id)]
+            if exception is not None:
+                error_msg = f"Error syncing task {task.id}: {exception}"
+                logger.error(error_msg)
+                result['errors'].append(error_msg)
+                return
+            
+            pushed_event_ids.add(response['id'])
+            link = links.get(task.id)
+            if link is None:
+                new_links.append(GoogleCalendarEvent(
+                    task=task,
+                    google_event_id=response['id'],
+                    google_calendar_id=calendar_id,
+                    etag=response.get('etag', '')
+                ))
+                result['events_created'] += 1
+            else:
+                result['events_created' if not link.google_event_id else 'events_updated'] += 1
+                link.google_event_id = response['id']
+                link.etag = response.get('etag', '')
+                link.last_updated = now
+                changed_links.append(link)
+        
+        for offset in range(0, len(tasks), self.BATCH_SIZE):
+            batch = self.service.new_batch_http_request(callback=handle_response)
+            for task in tasks[offset:offset + self.BATCH_SIZE]:
+                link = links.get(task.id)
+                if link and link.google_event_id:
+                    request = self.service.events().update(
+                        calendarId=calendar_id,
+                        eventId=link.google_event_id,
+                        body=self._task_to_event(task)
+                    )
+                else:
+                    request = self.service.events().insert(
+                        calendarId=calendar_id,
+                        body=self._task_to_event(task)
+                    )
+                batch.add(request, request_id=str(task.id))
+            try:
+                batch.execute()
+            finally:
+                # Link each batch's events right away: if a later batch fails,
+                # the next sync must update these events, not insert them again
+                with transaction.atomic():
+                    GoogleCalendarEvent.objects.bulk_create(new_links)
+                    GoogleCalendarEvent.objects.bulk_update(
+                        changed_links, ['google_event_id', 'etag', 'last_updated']
+                    )
+                new_links.clear()
+                changed_links.clear()
+        
+        return result, pushed_event_ids
+    
+    def _pull_events(self, calendar_id: str, start_date: datetime, end_date: datetime,
+                     skip_event_ids: set = frozenset()) -> Dict:
+        """Import timed events in the window, looking up their task links in one query."""
+        events_result = self.service.events().list(
+            calendarId=calendar_id,
+            timeMin=start_date.isoformat(),
+            timeMax=end_date.isoformat(),
+            singleEvents=True,
+            orderBy='startTime'
+        ).execute()
+        
+        # Skip all-day events and events whose content we just wrote ourselves
+        events = [
+            event for event in events_result.get('items', [])
+            if 'dateTime' in event.get('start', {}) and event['id'] not in skip_event_ids
+        ]
+        links = {
+            link.google_event_id: link
+            for link in GoogleCalendarEvent.objects.filter(
+                google_event_id__in=[event['id'] for event in events]
+            ).select_related('task')
+        }
+        
+        result = {'success': True, 'events_created': 0, 'events_updated': 0, 'errors': []}
+        new_links = []
+        
+        for event in events:
+            try:
+                link = links.get(event['id'])
+                if link:
+                    # Update existing task
+                    if self._update_task_from_event(link.task, event):
+                        result['events_updated'] += 1
+                else:
+                    # Create new task
+                    task = self._create_task_from_event(event)
+                    if task:
+                        new_links.append(GoogleCalendarEvent(
+                            task=task,
+                            google_event_id=event['id'],
+                            google_calendar_id=calendar_id,
+                            etag=event.get('etag', '')
+                        ))
+                        result['events_created'] += 1
+                        
+            except Exception as e:
+                error_msg = f"Error processing event {event.get('id')}: {e}"
+                logger.error(error_msg)
+                result['errors'].append(error_msg)
+        
+        GoogleCalendarEvent.objects.bulk_create(new_links)
+        return result
+    
     def _task_to_event(self, task: Task) -> Dict:
         """Convert a Task object to Google Calendar event data."""
         # Get task times and ensure they're in the correct timezone
@@ -313,12 +523,8 @@ class GoogleCalendarService:
                     .get('source') == 'task_planner'):
                 return None
             
-            start_time = datetime.fromisoformat(
-                event['start']['dateTime'].replace('Z', '+00:00')
-            )
-            end_time = datetime.fromisoformat(
-                event['end']['dateTime'].replace('Z', '+00:00')
-            )
+            start_time = datetime.fromisoformat(event['start']['dateTime'])
+            end_time = datetime.fromisoformat(event['end']['dateTime'])
             
             # Calculate estimated hours
             duration = end_time - start_time
@@ -345,12 +551,8 @@ class GoogleCalendarService:
     def _update_task_from_event(self, task: Task, event: Dict) -> bool:
         """Update a Task from Google Calendar event."""
         try:
-            start_time = datetime.fromisoformat(
-                event['start']['dateTime'].replace('Z', '+00:00')
-            )
-            end_time = datetime.fromisoformat(
-                event['end']['dateTime'].replace('Z', '+00:00')
-            )
+            start_time = datetime.fromisoformat(event['start']['dateTime'])
+            end_time = datetime.fromisoformat(event['end']['dateTime'])
             
             # Update task fields
             task.title = event.get('summary', task.title)
@@ -557,3 +759,88 @@ class GoogleCalendarService:
         except Exception as e:
             logger.error(f"Error deleting Google Calendar event {google_event_id}: {e}")
             return False
+
+
+def _reported_errors(errors: List[str]) -> Dict:
+    """Keep the status payload small; the full error text is in the sync log."""
+    return {'errors': errors[:MAX_REPORTED_ERRORS], 'error_count': len(errors)}
+
+
+def _sync_result_payload(operation: str, service: GoogleCalendarService,
+                         start_date: datetime = None, end_date: datetime = None) -> Dict:
+    """Run one sync operation and build the JSON payload reported to the browser."""
+    if operation == 'to_google':
+        result = service.sync_tasks_to_google()
+        message = f"Sync completed! Created {result['events_created']} events, updated {result['events_updated']} events."
+    elif operation == 'from_google':
+        result = service.sync_from_google(start_date, end_date)
+        message = f"Sync completed! Imported {result['events_created']} events, updated {result['events_updated']} tasks."
+    else:
+        result = service.full_sync()
+        to_google_result = result['to_google']
+        from_google_result = result['from_google']
+        if not (to_google_result['success'] and from_google_result['success']):
+            return {'success': False, 'message': 'Full sync partially failed. Please check sync logs.'}
+        
+        total_errors = to_google_result['errors'] + from_google_result['errors']
+        message = (
+            f"Full sync completed! "
+            f"To Google: {to_google_result['events_created']} created, {to_google_result['events_updated']} updated. "
+            f"From Google: {from_google_result['events_created']} imported, {from_google_result['events_updated']} updated."
+        )
+        if total_errors:
+            message += f" {len(total_errors)} errors occurred."
+        return {
+            'success': True,
+            'message': message,
+            'to_google': {**to_google_result, **_reported_errors(to_google_result['errors'])},
+            'from_google': {**from_google_result, **_reported_errors(from_google_result['errors'])},
+            **_reported_errors(total_errors)
+        }
+    
+    if not result['success']:
+        return {'success': False, 'message': 'Sync failed. Please check your Google Calendar connection.'}
+    if result['errors']:
+        message += f" {len(result['errors'])} errors occurred."
+    return {
+        'success': True,
+        'message': message,
+        'events_created': result['events_created'],
+        'events_updated': result['events_updated'],
+        **_reported_errors(result['errors'])
+    }
+
+
+def google_sync_task(user_id: int, job_id: str, operation: str,
+                     start_date: datetime = None, end_date: datetime = None):
+    """
+    Background task to run a Google Calendar sync started from the web UI.
+    The user's SyncLock carries job_id; it is released here once the sync ends.
+    Returns the job status, which is also stored under sync_job_status_key.
+    This function is called by Django-Q2.
+    """
+    status_key = sync_job_status_key(user_id, job_id)
+    
+    # A retried job must not sync a second time
+    status = cache.get(status_key, {})
+    if status.get('state') in ('complete', 'failed'):
+        return status
+    
+    try:
+        user = User.objects.get(pk=user_id)
+        service = GoogleCalendarService(user)
+        payload = _sync_result_payload(operation, service, start_date, end_date)
+        payload['state'] = 'complete'
+    except Exception:
+        logger.exception("Error running Google Calendar %s sync", operation)
+        payload = {
+            'state': 'failed',
+            'success': False,
+            'message': 'Sync failed. Please check your Google Calendar connection.'
+        }
+    finally:
+        # Leave a newer job's lock alone if ours already expired
+        SyncLock.objects.filter(user_id=user_id, process_id=job_id).delete()
+    
+    cache.set(status_key, payload, SYNC_STATUS_TIMEOUT)
+    return payload
@@ -151,6 +151,22 @@ class NotificationService:
         async_task('planner.services.notification_service.send_notification', notification.id)
 
 
+def refresh_task_reminders(task_id: int):
+    """
+    Background task to re-create a task's reminders after its slot changed
+    through QuerySet.update(), which skips the post_save handler.
+    This function is called by Django-Q2.
+    """
+    try:
+        task = Task.objects.select_related('user').get(id=task_id)
+    except Task.DoesNotExist:
+        logger.error(f"Task {task_id} not found")
+        return
+    
+    NotificationService.cancel_task_notifications(task)
+    NotificationService.schedule_task_reminders(task)
+
+
 def send_notification(notification_id: int):
     """
     Background task to send a notification.
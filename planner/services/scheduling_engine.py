@@ -1,7 +1,44 @@
 from datetime import datetime, timedelta
 from typing import List, Tuple, Optional
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
 from django.utils import timezone
-from ..models import Task, TimeBlock
+from ..caching import bump_schedule_version, cache_is_shared, get_schedule_version
+from ..models import OptimizationHistory, Task, TaskNotification, TimeBlock
+
+REOPTIMIZE_STATUS_TIMEOUT = 60 * 10
+ENGINE_INPUT_TIMEOUT = 60 * 5
+
+
+def get_scheduling_engine(request) -> 'SchedulingEngine':
+    """Return a SchedulingEngine shared by everything handling this request."""
+    if not hasattr(request, '_scheduling_engine'):
+        request._scheduling_engine = SchedulingEngine(request.user)
+    return request._scheduling_engine
+
+
+def reoptimize_status_key(user_id: int, job_id: str) -> str:
+    """Cache key holding the state and result of one reoptimize_schedule job."""
+    return f'reoptimize_status:{user_id}:{job_id}'
+
+
+def reoptimize_week_status_key(user_id: int, job_id: str) -> str:
+    """Cache key holding the state and result of one reoptimize_week job."""
+    return f'reoptimize_week:{user_id}:{job_id}'
+
+
+def optimized_version_key(user_id: int) -> str:
+    """Cache key holding the schedule version produced by the last re-optimization."""
+    return f'reoptimize_version:{user_id}'
+
+
+def is_schedule_optimized(user_id: int) -> bool:
+    """True if no task or time block changed since the last re-optimization."""
+    # A process-local cache can't tell whether another worker changed the schedule
+    if not cache_is_shared():
+        return False
+    return cache.get(optimized_version_key(user_id)) == get_schedule_version(user_id)
 
 
 class SchedulingEngine:
@@ -12,6 +49,26 @@ class SchedulingEngine:
 
     def __init__(self, user):
         self.user = user
+        self._time_blocks = None
+
+    @property
+    def time_blocks(self) -> List[TimeBlock]:
+        """
+        The user's time blocks, loaded once per engine instance. With a shared
+        cache they are also reused across requests until the schedule version
+        changes; a per-process version could miss another worker's edits.
+        """
+        if self._time_blocks is None:
+            if not cache_is_shared():
+                self._time_blocks = list(self.user.time_blocks.all())
+                return self._time_blocks
+            cache_key = f'engine_time_blocks:{self.user.id}:{get_schedule_version(self.user.id)}'
+            time_blocks = cache.get(cache_key)
+            if time_blocks is None:
+                time_blocks = list(self.user.time_blocks.all())
+                cache.set(cache_key, time_blocks, ENGINE_INPUT_TIMEOUT)
+            self._time_blocks = time_blocks
+        return self._time_blocks
 
     def calculate_schedule(self, tasks: List[Task] = None, time_blocks: List[TimeBlock] = None) -> Tuple[List[Task], List[Task]]:
         """
@@ -22,7 +79,7 @@ class SchedulingEngine:
             tasks = list(self.user.tasks.filter(status__in=['todo', 'in_progress'], is_locked=False))
         
         if time_blocks is None:
-            time_blocks = list(self.user.time_blocks.all())
+            time_blocks = self.time_blocks
 
         # Create available time slots from time blocks
         available_slots = self._generate_available_slots(time_blocks)
@@ -128,7 +185,7 @@ class SchedulingEngine:
         Returns True if successfully scheduled, False otherwise.
         """
         if time_blocks is None:
-            time_blocks = list(self.user.time_blocks.all())
+            time_blocks = self.time_blocks
         
         # Get fresh available slots
         available_slots = self._refresh_available_slots(time_blocks)
@@ -288,6 +345,28 @@ class SchedulingEngine:
         delta = slot['end'] - slot['start']
         return delta.total_seconds() / 3600
 
+    def save_schedule(self, tasks: List[Task]) -> None:
+        """
+        Persist the start/end times chosen by the engine in bulk UPDATEs.
+        bulk_update skips post_save, so task reminders are refreshed explicitly.
+        """
+        from .notification_service import NotificationService
+
+        if not tasks:
+            return
+
+        now = timezone.now()
+        for task in tasks:
+            task.updated_at = now
+
+        with transaction.atomic():
+            Task.objects.bulk_update(tasks, ['start_time', 'end_time', 'updated_at'], batch_size=500)
+        bump_schedule_version(self.user.id)
+
+        for task in tasks:
+            NotificationService.cancel_task_notifications(task)
+            NotificationService.schedule_task_reminders(task)
+
     def reschedule_week(self) -> Tuple[List[Task], List[Task]]:
         """Re-optimize the entire week's schedule."""
         # Clear existing schedule for unlocked tasks
@@ -296,10 +375,15 @@ class SchedulingEngine:
             is_locked=False
         )
         
-        for task in tasks_to_reschedule:
-            task.start_time = None
-            task.end_time = None
-            task.save()  # Save the changes to database
+        # One UPDATE per table instead of a save() per task; QuerySet.update
+        # skips the pre_save hook, so cancel pending reminders here
+        with transaction.atomic():
+            TaskNotification.objects.filter(
+                task__in=tasks_to_reschedule.filter(start_time__isnull=False),
+                status='pending'
+            ).update(status='cancelled')
+            tasks_to_reschedule.update(start_time=None, end_time=None, updated_at=timezone.now())
+        bump_schedule_version(self.user.id)
         
         # Recalculate schedule
         return self.calculate_schedule()
@@ -436,7 +520,7 @@ class SchedulingEngine:
             tasks = list(self.user.tasks.filter(status__in=['todo', 'in_progress'], is_locked=False))
         
         if time_blocks is None:
-            time_blocks = list(self.user.time_blocks.all())
+            time_blocks = self.time_blocks
 
         # Create available time slots from time blocks
         available_slots = self._generate_available_slots(time_blocks)
@@ -582,3 +666,120 @@ class SchedulingEngine:
                                max(sum(self._slot_duration(slot) for slot in available_slots), 0.01)) * 100,
             'overload_handled': True
         }
+
+
+def reoptimize_schedule_task(user_id: int, job_id: str):
+    """
+    Background task to re-optimize a user's week.
+    Returns the job status, which is also stored under reoptimize_status_key.
+    This function is called by Django-Q2.
+    """
+    status_key = reoptimize_status_key(user_id, job_id)
+
+    # A retried job must not reschedule a second time
+    status = cache.get(status_key, {})
+    if status.get('state') == 'complete':
+        return status
+
+    try:
+        user = User.objects.get(pk=user_id)
+        engine = SchedulingEngine(user)
+        scheduled_tasks, unscheduled_tasks = engine.reschedule_week()
+        engine.save_schedule(scheduled_tasks)
+    except Exception as e:
+        cache.set(status_key, {'state': 'failed', 'success': False, 'error': str(e)}, REOPTIMIZE_STATUS_TIMEOUT)
+        raise
+
+    cache.set(optimized_version_key(user_id), get_schedule_version(user_id), REOPTIMIZE_STATUS_TIMEOUT)
+    status = {
+        'state': 'complete',
+        'success': True,
+        'message': f'Schedule optimized! {len(scheduled_tasks)} tasks scheduled.',
+        'scheduled_count': len(scheduled_tasks),
+        'unscheduled_count': len(unscheduled_tasks),
+    }
+    cache.set(status_key, status, REOPTIMIZE_STATUS_TIMEOUT)
+    return status
+
+
+def reoptimize_week_task(user_id: int, job_id: str):
+    """
+    Background task to re-optimize a user's week with analysis and undo history.
+    Returns the job status, which is also stored under reoptimize_week_status_key.
+    This function is called by Django-Q2.
+    """
+    status_key = reoptimize_week_status_key(user_id, job_id)
+
+    # A retried job must not record a second optimization
+    status = cache.get(status_key, {})
+    if status.get('state') == 'complete':
+        return status
+
+    try:
+        user = User.objects.get(pk=user_id)
+
+        # Create snapshot of current state before optimization
+        optimization_history = OptimizationHistory(user=user)
+        current_task_snapshot = optimization_history.create_task_snapshot(user)
+
+        engine = SchedulingEngine(user)
+
+        # Use the enhanced scheduling with analysis
+        result = engine.calculate_schedule_with_analysis()
+
+        # Save optimization history
+        optimization_history.previous_task_state = current_task_snapshot
+        optimization_history.scheduled_count = len(result['scheduled_tasks'])
+        optimization_history.unscheduled_count = len(result['unscheduled_tasks'])
+        optimization_history.utilization_rate = result['utilization_rate']
+        optimization_history.total_hours_scheduled = result['total_scheduled_hours']
+        optimization_history.was_overloaded = result['overload_analysis']['is_overloaded']
+
+        if result['overload_analysis']['is_overloaded']:
+            optimization_history.overload_ratio = result['overload_analysis']['overload_ratio']
+            optimization_history.excess_hours = result['overload_analysis']['excess_hours']
+            optimization_history.recommendations = result['overload_analysis']['recommendations']
+
+        # Store optimization decisions for transparency
+        optimization_history.optimization_decisions = {
+            'algorithm_used': 'enhanced_priority_with_splitting',
+            'priority_factors': ['deadline_urgency', 'task_priority', 'estimated_hours'],
+            'task_splitting_enabled': True,
+            'overload_handling': 'priority_based_selection'
+        }
+
+        optimization_history.save()
+
+        # Send optimization notification
+        from .notification_service import NotificationService
+        NotificationService.send_optimization_notification(
+            user,
+            f"Schedule optimization complete! {len(result['scheduled_tasks'])} tasks scheduled with {round(result['utilization_rate'], 1)}% utilization."
+        )
+
+        # Save scheduled tasks
+        engine.save_schedule(result['scheduled_tasks'])
+    except Exception as e:
+        cache.set(status_key, {'state': 'failed', 'success': False, 'error': str(e)}, REOPTIMIZE_STATUS_TIMEOUT)
+        raise
+
+    # Prepare response with analysis and undo option
+    response_data = {
+        'state': 'complete',
+        'success': True,
+        'message': f'Schedule optimized! {len(result["scheduled_tasks"])} tasks scheduled.',
+        'scheduled_count': len(result['scheduled_tasks']),
+        'unscheduled_count': len(result['unscheduled_tasks']),
+        'utilization_rate': round(result['utilization_rate'], 1),
+        'overload_analysis': result['overload_analysis'],
+        'optimization_id': optimization_history.id,
+        'can_undo': True,  # Can undo for 1 hour
+    }
+
+    # Add recommendations if overloaded
+    if result['overload_analysis']['is_overloaded']:
+        response_data['recommendations'] = result['overload_analysis']['recommendations']
+        response_data['message'] += f' Warning: Schedule overloaded by {result["overload_analysis"]["excess_hours"]:.1f} hours.'
+
+    cache.set(status_key, response_data, REOPTIMIZE_STATUS_TIMEOUT)
+    return response_data
@@ -0,0 +1,110 @@
+"""
+Tests for the AI suggestion views.
+"""
+
+import time
+from datetime import timedelta
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from django.core import signing
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from planner.models import Task
+from planner.views.ai_views import AI_SUGGESTION_MAX_AGE, _suggestion_salt
+
+
+class ApplyAISuggestionsTestCase(TestCase):
+    """Test cases for applying signed AI scheduling suggestions."""
+
+    def setUp(self):
+        """Set up a logged-in user with one unscheduled task."""
+        self.user = User.objects.create_user(
+            username='testuser_ai',
+            email='test_ai@example.com',
+            password='testpass123'
+        )
+        self.other_user = User.objects.create_user(
+            username='otheruser_ai',
+            email='other_ai@example.com',
+            password='testpass123'
+        )
+        self.client.force_login(self.user)
+        self.task = Task.objects.create(
+            user=self.user,
+            title='Unscheduled Task',
+            estimated_hours=1,
+            deadline=timezone.now() + timedelta(days=7),
+            status='todo'
+        )
+        self.start = (timezone.now() + timedelta(days=1)).replace(microsecond=0)
+
+    def _token(self, task, start, user=None):
+        """Sign a suggestion the way get_ai_scheduling_suggestions does."""
+        return signing.dumps(
+            {
+                'task_id': task.id,
+                'start': start.isoformat(),
+                'end': (start + timedelta(hours=1)).isoformat(),
+            },
+            salt=_suggestion_salt(user or self.user)
+        )
+
+    def _apply(self, *tokens):
+        """Post the given tokens and return the decoded response."""
+        response = self.client.post(reverse('planner:apply_ai_suggestions'), {
+            'selected_suggestions': list(tokens),
+        })
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def assertNothingApplied(self, data):
+        """Assert the response applied nothing and the task is still unscheduled."""
+        self.assertEqual(data['applied_count'], 0)
+        self.task.refresh_from_db()
+        self.assertIsNone(self.task.start_time)
+
+    def test_valid_token_is_applied(self):
+        """Test that a token issued to this user schedules the task."""
+        data = self._apply(self._token(self.task, self.start))
+        self.assertEqual(data['applied_count'], 1)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.start_time, self.start)
+
+    def test_tampered_token_is_rejected(self):
+        """Test that a token whose payload was altered is rejected."""
+        token = self._token(self.task, self.start)
+        payload, rest = token.split(':', 1)
+        self.assertNothingApplied(self._apply(payload[:-1] + ('A' if payload[-1] != 'A' else 'B') + ':' + rest))
+
+    def test_expired_token_is_rejected(self):
+        """Test that a token older than AI_SUGGESTION_MAX_AGE is rejected."""
+        issued_at = time.time() - AI_SUGGESTION_MAX_AGE - 60
+        with patch('django.core.signing.time.time', return_value=issued_at):
+            token = self._token(self.task, self.start)
+        self.assertNothingApplied(self._apply(token))
+
+    def test_token_for_another_user_is_rejected(self):
+        """Test that a token signed with another user's salt is rejected."""
+        self.assertNothingApplied(self._apply(self._token(self.task, self.start, user=self.other_user)))
+
+    def test_already_scheduled_task_is_not_rescheduled(self):
+        """Test that a suggestion for a task that has since been scheduled is skipped."""
+        scheduled_start = self.start + timedelta(days=2)
+        self.task.start_time = scheduled_start
+        self.task.end_time = scheduled_start + timedelta(hours=1)
+        self.task.save()
+
+        data = self._apply(self._token(self.task, self.start))
+        self.assertEqual(data['applied_count'], 0)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.start_time, scheduled_start)
+
+    def test_duplicate_tokens_for_a_task_apply_once(self):
+        """Test that only the first of several tokens for the same task is applied."""
+        later_start = self.start + timedelta(hours=3)
+        data = self._apply(self._token(self.task, self.start), self._token(self.task, later_start))
+        self.assertEqual(data['applied_count'], 1)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.start_time, self.start)
@@ -0,0 +1,107 @@
+"""
+Tests for the task API views.
+"""
+
+import json
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from planner.models import Task
+from planner.views.api_views import update_task_time
+
+
+class ToggleTaskStatusTestCase(TestCase):
+    """Test cases for cycling a task's status from the task card."""
+
+    def setUp(self):
+        """Set up a logged-in user with one todo task."""
+        self.user = User.objects.create_user(
+            username='testuser_toggle',
+            email='test_toggle@example.com',
+            password='testpass123'
+        )
+        self.client.force_login(self.user)
+        self.task = Task.objects.create(
+            user=self.user,
+            title='Toggle Task',
+            deadline=timezone.now() + timedelta(days=2),
+            estimated_hours=1,
+        )
+        self.url = reverse('planner:toggle_task_status', args=[self.task.pk])
+
+    def toggle(self):
+        """Toggle the task once and return it as stored."""
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 204)
+        self.task.refresh_from_db()
+        return self.task
+
+    def test_completed_at_follows_each_step_of_the_cycle(self):
+        """Test that completed_at is set on completion and cleared when reopened."""
+        task = self.toggle()
+        self.assertEqual(task.status, 'in_progress')
+        self.assertIsNone(task.completed_at)
+
+        task = self.toggle()
+        self.assertEqual(task.status, 'completed')
+        self.assertIsNotNone(task.completed_at)
+
+        task = self.toggle()
+        self.assertEqual(task.status, 'todo')
+        self.assertIsNone(task.completed_at)
+
+    def test_completed_at_is_assigned_before_status(self):
+        """Test that the UPDATE reads the old status when setting completed_at, as MySQL requires."""
+        with CaptureQueriesContext(connection) as queries:
+            self.toggle()
+
+        update_sql = next(q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE'))
+        set_clause = update_sql.split(' SET ', 1)[1]
+        quote = connection.ops.quote_name
+        self.assertLess(set_clause.index(f"{quote('completed_at')} ="), set_clause.index(f"{quote('status')} ="))
+
+
+class InvalidTaskIdTestCase(TestCase):
+    """Test cases for AJAX endpoints given a task id that is not a number."""
+
+    def setUp(self):
+        """Set up a logged-in user."""
+        self.user = User.objects.create_user(
+            username='testuser_badid',
+            email='test_badid@example.com',
+            password='testpass123'
+        )
+        self.client.force_login(self.user)
+
+    def test_non_numeric_task_id_returns_json_400(self):
+        """Test that each endpoint rejects a malformed id with a JSON 400 naming the id."""
+        start = timezone.now().isoformat()
+        end = (timezone.now() + timedelta(hours=1)).isoformat()
+        requests = {
+            'planner:update_task_schedule': {'task_id': 'abc', 'start_time': start},
+            'planner:unschedule_task': {'task_id': 'abc'},
+            'planner:quick_schedule_task': {'task_id': 'abc'},
+            'planner:update_task_status': {'task_id': 'abc', 'status': 'completed'},
+        }
+        for url_name, data in requests.items():
+            with self.subTest(url_name=url_name):
+                response = self.client.post(reverse(url_name), data)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['error'], 'Invalid task ID')
+
+    def test_update_task_time_reports_invalid_task_id(self):
+        """Test that a malformed id is not reported as a datetime error."""
+        request = RequestFactory().post('/', {
+            'task_id': 'abc',
+            'start_time': timezone.now().isoformat(),
+            'end_time': (timezone.now() + timedelta(hours=1)).isoformat(),
+        })
+        request.user = self.user
+        response = update_task_time(request)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.content)['error'], 'Invalid task ID')
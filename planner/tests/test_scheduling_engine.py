@@ -4,15 +4,32 @@ These tests validate the core scheduling logic as required by Epic 1.5.
 """
 
 import pytest
+import tempfile
 from datetime import datetime, timedelta
 from decimal import Decimal
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.utils import timezone
 from unittest.mock import patch, MagicMock
 
-from planner.models import Task, TimeBlock
-from planner.services.scheduling_engine import SchedulingEngine
+from planner.models import OptimizationHistory, Task, TimeBlock
+from planner.services.scheduling_engine import (
+    SchedulingEngine,
+    is_schedule_optimized,
+    reoptimize_schedule_task,
+    reoptimize_status_key,
+    reoptimize_week_status_key,
+    reoptimize_week_task,
+)
+
+# A file-based cache stands in for the shared cache used in production
+SHARED_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': tempfile.mkdtemp(),
+    }
+}
 
 
 class SchedulingEngineTestCase(TestCase):
@@ -305,6 +322,69 @@ class SchedulingEngineTestCase(TestCase):
         self.assertIsNotNone(locked_task.start_time)
         self.assertIsNotNone(locked_task.end_time)
 
+    @patch('django.utils.timezone.now')
+    def test_reoptimize_schedule_task_saves_schedule_and_status(self, mock_timezone_now):
+        """Test that the background re-optimization persists tasks and reports completion."""
+        mock_timezone_now.return_value = self.mock_now
+        
+        task = self.create_task(title="Background Task", estimated_hours=2.0)
+        self.create_time_block(start_hour=9, end_hour=17, day_offset=1)
+        
+        status = reoptimize_schedule_task(self.user.id, 'job-1')
+        
+        task.refresh_from_db()
+        self.assertIsNotNone(task.start_time)
+        self.assertEqual(task.end_time - task.start_time, timedelta(hours=2))
+        
+        self.assertEqual(status['state'], 'complete')
+        self.assertEqual(status['scheduled_count'], 1)
+        self.assertEqual(status['unscheduled_count'], 0)
+        self.assertEqual(cache.get(reoptimize_status_key(self.user.id, 'job-1')), status)
+        
+        # A process-local cache can't vouch for other workers, so never skip
+        self.assertFalse(is_schedule_optimized(self.user.id))
+
+    @override_settings(CACHES=SHARED_CACHES)
+    @patch('django.utils.timezone.now')
+    def test_is_schedule_optimized_with_shared_cache(self, mock_timezone_now):
+        """Test that a re-optimization can be skipped until a task moves."""
+        mock_timezone_now.return_value = self.mock_now
+        cache.clear()
+        
+        task = self.create_task(title="Background Task", estimated_hours=2.0)
+        self.create_time_block(start_hour=9, end_hour=17, day_offset=1)
+        self.assertFalse(is_schedule_optimized(self.user.id))
+        
+        reoptimize_schedule_task(self.user.id, 'job-1')
+        self.assertTrue(is_schedule_optimized(self.user.id))
+        
+        task.title = "Renamed Task"
+        task.save()
+        self.assertFalse(is_schedule_optimized(self.user.id))
+
+    @patch('django.utils.timezone.now')
+    def test_reoptimize_week_task_stores_result_once(self, mock_timezone_now):
+        """Test that the background week optimization records its result and is safe to retry."""
+        mock_timezone_now.return_value = self.mock_now
+        
+        task = self.create_task(title="Week Task", estimated_hours=2.0)
+        self.create_time_block(start_hour=9, end_hour=17, day_offset=1)
+        
+        reoptimize_week_task(self.user.id, 'job-1')
+        
+        task.refresh_from_db()
+        self.assertIsNotNone(task.start_time)
+        
+        status = cache.get(reoptimize_week_status_key(self.user.id, 'job-1'))
+        self.assertEqual(status['state'], 'complete')
+        self.assertTrue(status['success'])
+        self.assertEqual(status['scheduled_count'], 1)
+        self.assertEqual(status['optimization_id'], OptimizationHistory.objects.get(user=self.user).id)
+        
+        # A retry of the same job must not record a second optimization
+        self.assertEqual(reoptimize_week_task(self.user.id, 'job-1'), status)
+        self.assertEqual(OptimizationHistory.objects.filter(user=self.user).count(), 1)
+
     @patch('django.utils.timezone.now')
     def test_generate_available_slots_excludes_completed_tasks(self, mock_timezone_now):
         """Test that completed tasks don't affect available slots."""
@@ -33,7 +33,10 @@ urlpatterns = [
     path('calendar/update-task/', views.update_task_schedule, name='update_task_schedule'),
     path('calendar/unschedule/', views.unschedule_task, name='unschedule_task'),
     path('calendar/reoptimize/', views.reoptimize_week, name='reoptimize_week'),
+    path('calendar/reoptimize/status/<str:task_id>/', views.reoptimize_week_status, name='reoptimize_week_status'),
     path('calendar/undo-optimization/', views.undo_optimization, name='undo_optimization'),
+    path('calendar/reoptimize-schedule/', views.reoptimize_schedule, name='reoptimize_schedule'),
+    path('calendar/reoptimize-schedule/status/<str:task_id>/', views.reoptimize_schedule_status, name='reoptimize_schedule_status'),
     path('calendar/auto-schedule-all/', views.auto_schedule_all_tasks, name='auto_schedule_all_tasks'),
     path('calendar/check-overload/', views.check_overload, name='check_overload'),
     path('calendar/compress-schedule/', views.compress_schedule, name='compress_schedule'),
@@ -87,6 +90,7 @@ urlpatterns = [
     path('google-calendar/sync-to/', views.sync_to_google, name='sync_to_google'),
     path('google-calendar/sync-from/', views.sync_from_google, name='sync_from_google'),
     path('google-calendar/full-sync/', views.full_sync, name='full_sync'),
+    path('google-calendar/sync/status/<str:task_id>/', views.google_sync_job_status, name='google_sync_job_status'),
     path('google-calendar/status/', views.sync_status, name='sync_status'),
     path('google-calendar/toggle-auto/', views.toggle_auto_sync, name='toggle_auto_sync'),
     
@@ -23,8 +23,10 @@ from .scheduling_views import (
     update_task_schedule,
     unschedule_task,
     reoptimize_week,
+    reoptimize_week_status,
     undo_optimization,
     reoptimize_schedule,
+    reoptimize_schedule_status,
     auto_schedule_all_tasks,
     quick_schedule_task,
     schedule_urgent_tasks,
@@ -82,6 +84,7 @@ from .google_calendar_views import (
     sync_to_google,
     sync_from_google,
     full_sync,
+    google_sync_job_status,
     sync_status,
     toggle_auto_sync,
     GoogleConnectionView,
@@ -137,8 +140,10 @@ __all__ = [
     'update_task_schedule',
     'unschedule_task',
     'reoptimize_week',
+    'reoptimize_week_status',
     'undo_optimization',
     'reoptimize_schedule',
+    'reoptimize_schedule_status',
     'auto_schedule_all_tasks',
     'quick_schedule_task',
     'schedule_urgent_tasks',
@@ -189,6 +194,7 @@ __all__ = [
     'sync_to_google',
     'sync_from_google',
     'full_sync',
+    'google_sync_job_status',
     'sync_status',
     'toggle_auto_sync',
     'GoogleConnectionView',
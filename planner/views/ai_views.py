@@ -4,15 +4,69 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import TemplateView
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
+from django.core import signing
+from django.db.models import Count, Q
 from django.utils import timezone
-from django.db import transaction
 from datetime import datetime, timedelta
 import logging
 
+from ..caching import bump_schedule_version, cache_is_shared
 from ..models import Task, TimeBlock
 
 logger = logging.getLogger(__name__)
 
+AI_SUGGESTION_MAX_AGE = 60 * 30
+
+PRIORITY_LABELS = dict(Task.PRIORITY_CHOICES)
+
+# Task columns summarised for the AI chat context, read as plain dicts
+CHAT_CONTEXT_TASK_FIELDS = (
+    'id', 'title', 'description', 'status', 'priority', 'deadline',
+    'estimated_hours', 'actual_hours', 'start_time', 'end_time', 'is_locked',
+)
+
+
+def _suggestion_salt(user):
+    """Signing salt that ties suggestion tokens to the user they were issued to."""
+    return f'planner.ai_suggestion:{user.id}'
+
+
+def _unscheduled_tasks(user):
+    """The tasks the AI views ask the AI service to place."""
+    return list(user.tasks.filter(
+        start_time__isnull=True,
+        status__in=['todo', 'in_progress']
+    ).only(*Task.CARD_FIELDS))
+
+
+def _blocks_in_window(request, start_date, end_date):
+    """
+    Time blocks overlapping [start_date, end_date). The scheduling engine's
+    block list is reused when this request already loaded it or the shared
+    cache holds it; otherwise only the window is queried.
+    """
+    from ..services.scheduling_engine import get_scheduling_engine
+    
+    engine = getattr(request, '_scheduling_engine', None)
+    if (engine is not None and engine._time_blocks is not None) or cache_is_shared():
+        # A block overlaps if: block.start_time < end_date AND block.end_time > start_date
+        return [
+            block for block in get_scheduling_engine(request).time_blocks
+            if block.start_time < end_date and block.end_time > start_date
+        ]
+    return list(request.user.time_blocks.filter(
+        start_time__lt=end_date,
+        end_time__gt=start_date
+    ))
+
+
+def _parse_suggested_time(value: str) -> datetime:
+    """Parse an ISO timestamp from the AI service, assuming the server time zone if it has none."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
 
 @login_required
 def get_ai_scheduling_suggestions(request):
@@ -21,10 +75,7 @@ def get_ai_scheduling_suggestions(request):
         from ..services.ai_service import get_ai_scheduling_suggestions_sync
         
         # Get unscheduled tasks
-        unscheduled_tasks = list(request.user.tasks.filter(
-            start_time__isnull=True,
-            status__in=['todo', 'in_progress']
-        ))
+        unscheduled_tasks = _unscheduled_tasks(request.user)
         
         if not unscheduled_tasks:
             return JsonResponse({
@@ -39,11 +90,7 @@ def get_ai_scheduling_suggestions(request):
         end_date = start_date + timedelta(days=7)
         
         # Find time blocks that overlap with the next 7 days
-        # A block overlaps if: block.start_time < end_date AND block.end_time > start_date
-        available_blocks = list(request.user.time_blocks.filter(
-            start_time__lt=end_date,  # Block starts before the 7-day window ends
-            end_time__gt=start_date   # Block ends after the window starts
-        ))
+        available_blocks = _blocks_in_window(request, start_date, end_date)
         
         if not available_blocks:
             # Auto-create default time blocks if none exist
@@ -63,21 +110,30 @@ def get_ai_scheduling_suggestions(request):
         if ai_response.success:
             # Format suggestions for frontend
             suggestions_data = []
+            tasks_by_id = {task.id: task for task in unscheduled_tasks}
             for suggestion in ai_response.suggestions:
                 # Get task details
-                try:
-                    task = next(t for t in unscheduled_tasks if t.id == suggestion.task_id)
-                    suggestions_data.append({
-                        'task_id': suggestion.task_id,
-                        'task_title': task.title,
-                        'task_description': task.description,
-                        'suggested_start_time': suggestion.suggested_start_time,
-                        'suggested_end_time': suggestion.suggested_end_time,
-                        'confidence_score': suggestion.confidence_score,
-                        'reasoning': suggestion.reasoning
-                    })
-                except StopIteration:
+                task = tasks_by_id.get(suggestion.task_id)
+                if task is None:
                     continue  # Task not found, skip
+                suggestions_data.append({
+                    'task_id': suggestion.task_id,
+                    'task_title': task.title,
+                    'task_description': task.description,
+                    'suggested_start_time': suggestion.suggested_start_time,
+                    'suggested_end_time': suggestion.suggested_end_time,
+                    'confidence_score': suggestion.confidence_score,
+                    'reasoning': suggestion.reasoning,
+                    # Posted back to apply_ai_suggestions, which trusts it instead of asking the AI again
+                    'token': signing.dumps(
+                        {
+                            'task_id': suggestion.task_id,
+                            'start': suggestion.suggested_start_time,
+                            'end': suggestion.suggested_end_time,
+                        },
+                        salt=_suggestion_salt(request.user)
+                    ),
+                })
             
             return JsonResponse({
                 'success': True,
@@ -107,7 +163,7 @@ def get_ai_scheduling_suggestions(request):
 @login_required
 @require_POST
 def apply_ai_suggestions(request):
-    """Apply selected AI scheduling suggestions to actually schedule tasks."""
+    """Apply the AI scheduling suggestions whose signed tokens were selected."""
     try:
         selected_suggestions = request.POST.getlist('selected_suggestions')
         logger.info(f"DEBUG: Received selected_suggestions: {selected_suggestions}")
@@ -119,81 +175,67 @@ def apply_ai_suggestions(request):
                 'error': 'No suggestions selected'
             })
         
-        # Get fresh AI suggestions to ensure data integrity
-        from ..services.ai_service import get_ai_scheduling_suggestions_sync
-        
-        # Get unscheduled tasks
-        unscheduled_tasks = list(request.user.tasks.filter(
-            start_time__isnull=True,
-            status__in=['todo', 'in_progress']
-        ))
-        
-        # Get available time blocks
-        from datetime import timedelta
-        start_date = timezone.now()
-        end_date = start_date + timedelta(days=7)
-        
-        # Find time blocks that overlap with the next 7 days
-        available_blocks = list(request.user.time_blocks.filter(
-            start_time__lt=end_date,  # Block starts before the 7-day window ends
-            end_time__gt=start_date   # Block ends after the window starts
-        ))
-        
-        # Get fresh AI suggestions
-        ai_response = get_ai_scheduling_suggestions_sync(unscheduled_tasks, available_blocks)
-        
-        if not ai_response.success:
-            logger.error(f"DEBUG: Failed to get fresh AI suggestions: {ai_response.error_message}")
-            return JsonResponse({
-                'success': False,
-                'error': 'Unable to retrieve current AI suggestions'
-            })
-            
-        logger.info(f"DEBUG: Got {len(ai_response.suggestions)} fresh AI suggestions")
+        # Each selection is a signed suggestion token issued by get_ai_scheduling_suggestions;
+        # only the first token for a task is kept so a task is never scheduled twice
+        suggestions = {}
+        for token in selected_suggestions:
+            try:
+                suggestion = signing.loads(
+                    token, salt=_suggestion_salt(request.user), max_age=AI_SUGGESTION_MAX_AGE
+                )
+            except signing.BadSignature as e:
+                logger.warning(f"Rejected AI suggestion token for user {request.user.id}: {e}")
+                continue
+            suggestions.setdefault(suggestion['task_id'], suggestion)
+        suggestions = list(suggestions.values())
+        
+        # Only tasks that are still unscheduled can take a suggestion
+        tasks_by_id = {
+            task.id: task
+            for task in request.user.tasks.filter(
+                id__in=[suggestion['task_id'] for suggestion in suggestions],
+                start_time__isnull=True,
+                status__in=['todo', 'in_progress']
+            ).only(*Task.CARD_FIELDS)
+        }
         
         # Apply selected suggestions
-        applied_count = 0
-        
-        with transaction.atomic():
-            for suggestion in ai_response.suggestions:
-                # Check if this suggestion was selected
-                suggestion_id = f"{suggestion.task_id}_{suggestion.suggested_start_time}"
-                logger.info(f"DEBUG: Checking suggestion ID: {suggestion_id}")
-                logger.info(f"DEBUG: Selected suggestions: {selected_suggestions}")
+        tasks_to_update = []
+        from ..services.scheduling_engine import get_scheduling_engine
+        engine = get_scheduling_engine(request)
+        
+        for suggestion in suggestions:
+            logger.info(f"DEBUG: Processing suggestion for task {suggestion['task_id']}")
+            try:
+                task = tasks_by_id.get(suggestion['task_id'])
+                if task is None:
+                    raise Task.DoesNotExist(f"Task {suggestion['task_id']} is not an unscheduled task")
                 
-                if suggestion_id in selected_suggestions:
-                    logger.info(f"DEBUG: Processing suggestion for task {suggestion.task_id}")
-                    try:
-                        # Get the task
-                        task = request.user.tasks.get(id=suggestion.task_id)
-                        logger.info(f"DEBUG: Found task: {task.title}")
-                        
-                        # Parse suggested times
-                        start_time = timezone.datetime.fromisoformat(suggestion.suggested_start_time.replace('Z', '+00:00'))
-                        end_time = timezone.datetime.fromisoformat(suggestion.suggested_end_time.replace('Z', '+00:00'))
-                        logger.info(f"DEBUG: Parsed times - start: {start_time}, end: {end_time}")
-                        
-                        # Check for conflicts before applying
-                        from ..services.scheduling_engine import SchedulingEngine
-                        engine = SchedulingEngine(request.user)
-                        
-                        if engine._check_for_conflicts(start_time, end_time, exclude_task_id=task.id):
-                            logger.warning(f"DEBUG: Conflict detected for task {task.title}, skipping this suggestion")
-                            continue
-                        
-                        # Apply the scheduling
-                        task.start_time = start_time
-                        task.end_time = end_time
-                        task.save()
-                        logger.info(f"DEBUG: Successfully scheduled task {task.title}")
-                        
-                        applied_count += 1
-                        
-                    except (Task.DoesNotExist, ValueError) as e:
-                        logger.warning(f"Failed to apply suggestion for task {suggestion.task_id}: {e}")
-                        continue
-                else:
-                    logger.info(f"DEBUG: Suggestion {suggestion_id} not in selected suggestions")
+                # Parse suggested times; fromisoformat accepts the 'Z' suffix natively
+                start_time = _parse_suggested_time(suggestion['start'])
+                end_time = _parse_suggested_time(suggestion['end'])
+                
+                # Check for conflicts before applying, including suggestions accepted above
+                overlaps_applied = any(
+                    start_time < other.end_time and end_time > other.start_time
+                    for other in tasks_to_update
+                )
+                if overlaps_applied or engine._check_for_conflicts(start_time, end_time, exclude_task_id=task.id):
+                    logger.warning(f"DEBUG: Conflict detected for task {task.title}, skipping this suggestion")
+                    continue
+                
+                # Apply the scheduling
+                task.start_time = start_time
+                task.end_time = end_time
+                tasks_to_update.append(task)
+                logger.info(f"DEBUG: Scheduled task {task.title}")
+                
+            except (Task.DoesNotExist, ValueError) as e:
+                logger.warning(f"Failed to apply suggestion for task {suggestion['task_id']}: {e}")
+                continue
+        
+        engine.save_schedule(tasks_to_update)
+        applied_count = len(tasks_to_update)
         
         # Send notification about applied AI suggestions
         from ..services.notification_service import NotificationService
@@ -252,36 +294,36 @@ class AIChatView(LoginRequiredMixin, TemplateView):
                 user=self.request.user
             ).order_by('-timestamp')[:5]
         
-        # Calculate some stats for context
-        total_tasks = user_tasks.count()
-        completed_tasks = user_tasks.filter(status='completed').count()
-        scheduled_tasks = user_tasks.filter(start_time__isnull=False).count()
-        unscheduled_tasks = total_tasks - scheduled_tasks
-        
-        # Recent activity summary
+        # Calculate some stats for context, in a single query
         today = timezone.now().date()
-        tasks_due_today = user_tasks.filter(
-            deadline__date=today,
-            status__in=['todo', 'in_progress']
-        ).count()
-        
-        tasks_due_soon = user_tasks.filter(
-            deadline__date__lte=today + timedelta(days=3),
-            deadline__date__gt=today,
-            status__in=['todo', 'in_progress']
-        ).count()
+        open_task = Q(status__in=['todo', 'in_progress'])
+        stats = user_tasks.aggregate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(status='completed')),
+            scheduled=Count('id', filter=Q(start_time__isnull=False)),
+            due_today=Count('id', filter=open_task & Q(deadline__date=today)),
+            due_soon=Count('id', filter=open_task & Q(
+                deadline__date__lte=today + timedelta(days=3),
+                deadline__date__gt=today,
+            )),
+        )
+        total_tasks = stats['total']
+        completed_tasks = stats['completed']
         
         context.update({
-            'user_tasks': user_tasks[:10],  # Recent tasks for display
+            # Recent tasks for display; the sidebar never shows descriptions
+            'user_tasks': user_tasks.only(
+                'id', 'title', 'priority', 'deadline', 'estimated_hours', 'start_time', 'end_time'
+            )[:10],
             'time_blocks': time_blocks,
             'recent_optimizations': recent_optimizations,
             'stats': {
                 'total_tasks': total_tasks,
                 'completed_tasks': completed_tasks,
-                'scheduled_tasks': scheduled_tasks,
-                'unscheduled_tasks': unscheduled_tasks,
-                'tasks_due_today': tasks_due_today,
-                'tasks_due_soon': tasks_due_soon,
+                'scheduled_tasks': stats['scheduled'],
+                'unscheduled_tasks': total_tasks - stats['scheduled'],
+                'tasks_due_today': stats['due_today'],
+                'tasks_due_soon': stats['due_soon'],
                 'completion_rate': (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0,
             }
         })
@@ -289,55 +331,6 @@ class AIChatView(LoginRequiredMixin, TemplateView):
         return context
 
 
-def _create_default_time_blocks(user, start_date, end_date):
-    """Create default time blocks for users who haven't set up their availability."""
-    from datetime import datetime, timedelta
-    import pytz
-    
-    try:
-        created_blocks = []
-        current_date = start_date.date()
-        end_date_only = end_date.date()
-        
-        # Create default 9 AM to 5 PM availability for weekdays only
-        while current_date <= end_date_only:
-            # Skip weekends (Saturday=5, Sunday=6)
-            if current_date.weekday() < 5:  # Monday=0 to Friday=4
-                # Create time block from 9 AM to 5 PM
-                start_time = timezone.make_aware(
-                    datetime.combine(current_date, datetime.min.time().replace(hour=9))
-                )
-                end_time = timezone.make_aware(
-                    datetime.combine(current_date, datetime.min.time().replace(hour=17))
-                )
-                
-                # Only create if it doesn't already exist
-                existing_block = user.time_blocks.filter(
-                    start_time__date=current_date
-                ).first()
-                
-                if not existing_block:
-                    time_block = TimeBlock.objects.create(
-                        user=user,
-                        start_time=start_time,
-                        end_time=end_time,
-                        is_recurring=False
-                    )
-                    created_blocks.append(time_block)
-                    logger.info(f"Created default time block for {user.username}: {current_date} 9:00-17:00")
-            
-            current_date += timedelta(days=1)
-        
-        if created_blocks:
-            logger.info(f"Created {len(created_blocks)} default time blocks for user {user.username}")
-        
-        return created_blocks
-        
-    except Exception as e:
-        logger.error(f"Error creating default time blocks for user {user.username}: {e}")
-        return []
-
-
 @login_required
 @require_POST
 def send_ai_chat_message(request):
@@ -708,10 +701,10 @@ def _get_user_schedule_context(user):
     """Get comprehensive user context for AI chat."""
     from datetime import datetime, timedelta
     
-    # Get tasks
-    all_tasks = list(user.tasks.all().order_by('deadline'))
-    scheduled_tasks = [t for t in all_tasks if t.is_scheduled]
-    unscheduled_tasks = [t for t in all_tasks if not t.is_scheduled]
+    # Only the first 20 tasks are described in full; the rest are just counted
+    current_tasks = list(user.tasks.order_by('deadline').values(*CHAT_CONTEXT_TASK_FIELDS)[:20])
+    for t in current_tasks:
+        t['is_scheduled'] = t['start_time'] is not None and t['end_time'] is not None
     
     # Get time blocks
     time_blocks = list(user.time_blocks.all().order_by('start_time'))
@@ -727,13 +720,26 @@ def _get_user_schedule_context(user):
         pass
     
     # Calculate schedule metrics
-    today = timezone.now().date()
     now = timezone.now()
     
     # Tasks due today and soon
-    tasks_due_today = [t for t in all_tasks if t.deadline.date() == today and t.status != 'completed']
-    tasks_due_this_week = [t for t in all_tasks if t.deadline.date() <= today + timedelta(days=7) and t.status != 'completed']
-    overdue_tasks = [t for t in all_tasks if t.deadline < now and t.status != 'completed']
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    open_tasks = user.tasks.exclude(status='completed')
+    due_today = Q(deadline__gte=today_start, deadline__lt=today_start + timedelta(days=1))
+    due_this_week = Q(deadline__lt=today_start + timedelta(days=8))
+    overdue = Q(deadline__lt=now)
+    
+    counts = user.tasks.aggregate(
+        total=Count('id'),
+        scheduled=Count('id', filter=Q(start_time__isnull=False, end_time__isnull=False)),
+        completed=Count('id', filter=Q(status='completed')),
+        due_today=Count('id', filter=due_today & ~Q(status='completed')),
+        due_this_week=Count('id', filter=due_this_week & ~Q(status='completed')),
+        overdue=Count('id', filter=overdue & ~Q(status='completed')),
+    )
+    urgency_fields = ('title', 'deadline', 'priority', 'estimated_hours')
+    tasks_due_today = list(open_tasks.filter(due_today).order_by('deadline').values(*urgency_fields))
+    overdue_tasks = list(open_tasks.filter(overdue).order_by('deadline').values(*urgency_fields)[:5])
     
     # Recent Pomodoro sessions
     recent_pomodoros = []
@@ -742,7 +748,7 @@ def _get_user_schedule_context(user):
         recent_pomodoros = list(PomodoroSession.objects.filter(
             task__user=user,
             start_time__gte=now - timedelta(days=7)
-        ).order_by('-start_time')[:5])
+        ).select_related('task').order_by('-start_time')[:5])
     except:
         pass
     
@@ -754,31 +760,31 @@ def _get_user_schedule_context(user):
             'timezone': str(timezone.get_current_timezone()),
         },
         'schedule_overview': {
-            'total_tasks': len(all_tasks),
-            'scheduled_tasks': len(scheduled_tasks),
-            'unscheduled_tasks': len(unscheduled_tasks),
-            'completed_tasks': len([t for t in all_tasks if t.status == 'completed']),
+            'total_tasks': counts['total'],
+            'scheduled_tasks': counts['scheduled'],
+            'unscheduled_tasks': counts['total'] - counts['scheduled'],
+            'completed_tasks': counts['completed'],
             'total_time_blocks': len(time_blocks),
-            'tasks_due_today': len(tasks_due_today),
-            'tasks_due_this_week': len(tasks_due_this_week),
-            'overdue_tasks': len(overdue_tasks),
+            'tasks_due_today': counts['due_today'],
+            'tasks_due_this_week': counts['due_this_week'],
+            'overdue_tasks': counts['overdue'],
         },
         'current_tasks': [
             {
-                'id': t.id,
-                'title': t.title,
-                'description': t.description or '',
-                'status': t.status,
-                'priority': t.priority,
-                'priority_display': t.get_priority_display(),
-                'deadline': t.deadline.isoformat(),
-                'estimated_hours': float(t.estimated_hours),
-                'actual_hours': float(t.actual_hours) if t.actual_hours else None,
-                'is_scheduled': t.is_scheduled,
-                'start_time': t.start_time.isoformat() if t.start_time else None,
-                'end_time': t.end_time.isoformat() if t.end_time else None,
-                'is_locked': t.is_locked,
-            } for t in all_tasks[:20]  # Limit to recent/important tasks
+                'id': t['id'],
+                'title': t['title'],
+                'description': t['description'] or '',
+                'status': t['status'],
+                'priority': t['priority'],
+                'priority_display': PRIORITY_LABELS.get(t['priority'], t['priority']),
+                'deadline': t['deadline'].isoformat(),
+                'estimated_hours': float(t['estimated_hours']),
+                'actual_hours': float(t['actual_hours']) if t['actual_hours'] else None,
+                'is_scheduled': t['is_scheduled'],
+                'start_time': t['start_time'].isoformat() if t['start_time'] else None,
+                'end_time': t['end_time'].isoformat() if t['end_time'] else None,
+                'is_locked': t['is_locked'],
+            } for t in current_tasks
         ],
         'availability': [
             {
@@ -814,18 +820,18 @@ def _get_user_schedule_context(user):
         'urgency_analysis': {
             'overdue_tasks': [
                 {
-                    'title': t.title,
-                    'deadline': t.deadline.isoformat(),
-                    'priority': t.get_priority_display(),
-                    'estimated_hours': float(t.estimated_hours),
-                } for t in overdue_tasks[:5]
+                    'title': t['title'],
+                    'deadline': t['deadline'].isoformat(),
+                    'priority': PRIORITY_LABELS.get(t['priority'], t['priority']),
+                    'estimated_hours': float(t['estimated_hours']),
+                } for t in overdue_tasks
             ],
             'due_today': [
                 {
-                    'title': t.title,
-                    'deadline': t.deadline.isoformat(),
-                    'priority': t.get_priority_display(),
-                    'estimated_hours': float(t.estimated_hours),
+                    'title': t['title'],
+                    'deadline': t['deadline'].isoformat(),
+                    'priority': PRIORITY_LABELS.get(t['priority'], t['priority']),
+                    'estimated_hours': float(t['estimated_hours']),
                 } for t in tasks_due_today
             ]
         }
@@ -836,47 +842,46 @@ def _get_user_schedule_context(user):
 
 def _create_default_time_blocks(user, start_date, end_date):
     """Create default time blocks for users who haven't set up their availability."""
-    from datetime import datetime, timedelta
-    import pytz
-    
     try:
-        created_blocks = []
         current_date = start_date.date()
         end_date_only = end_date.date()
+        day_start = datetime.min.time().replace(hour=9)
+        day_end = datetime.min.time().replace(hour=17)
+        
+        # Days that already have a block, fetched once for the whole range
+        existing_dates = {
+            timezone.localtime(block_start).date()
+            for block_start in user.time_blocks.filter(
+                start_time__date__gte=current_date,
+                start_time__date__lte=end_date_only
+            ).values_list('start_time', flat=True)
+        }
         
         # Create default 9 AM to 5 PM availability for weekdays only
+        new_blocks = []
         while current_date <= end_date_only:
-            # Skip weekends (Saturday=5, Sunday=6)
-            if current_date.weekday() < 5:  # Monday=0 to Friday=4
-                # Create time block from 9 AM to 5 PM
-                start_time = timezone.make_aware(
-                    datetime.combine(current_date, datetime.min.time().replace(hour=9))
-                )
-                end_time = timezone.make_aware(
-                    datetime.combine(current_date, datetime.min.time().replace(hour=17))
-                )
-                
-                # Only create if it doesn't already exist
-                existing_block = user.time_blocks.filter(
-                    start_time__date=current_date
-                ).first()
-                
-                if not existing_block:
-                    time_block = TimeBlock.objects.create(
-                        user=user,
-                        start_time=start_time,
-                        end_time=end_time,
-                        is_recurring=False
-                    )
-                    created_blocks.append(time_block)
-                    logger.info(f"Created default time block for {user.username}: {current_date} 9:00-17:00")
+            # Skip weekends (Saturday=5, Sunday=6), and days that already have a block
+            if current_date.weekday() < 5 and current_date not in existing_dates:
+                new_blocks.append(TimeBlock(
+                    user=user,
+                    start_time=timezone.make_aware(datetime.combine(current_date, day_start)),
+                    end_time=timezone.make_aware(datetime.combine(current_date, day_end)),
+                    is_recurring=False
+                ))
             
             current_date += timedelta(days=1)
         
-        if created_blocks:
-            logger.info(f"Created {len(created_blocks)} default time blocks for user {user.username}")
+        if not new_blocks:
+            return []
         
-        return created_blocks
+        TimeBlock.objects.bulk_create(new_blocks)
+        bump_schedule_version(user.id)
+        logger.info(f"Created {len(new_blocks)} default time blocks for user {user.username}")
+        
+        # MySQL can't return primary keys from a bulk insert, so read the rows back
+        return list(user.time_blocks.filter(
+            start_time__in=[block.start_time for block in new_blocks]
+        ))
         
     except Exception as e:
         logger.error(f"Error creating default time blocks for user {user.username}: {e}")
@@ -1,16 +1,20 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
 from django.views.decorators.http import require_POST, require_GET
 from django.utils import timezone
 from datetime import datetime, timedelta, date
-from django.db.models import Count, Q
+from django.db.models import Case, Count, F, Q, Value, When
+from django_q.tasks import async_task
 import logging
 
+from ..caching import bump_schedule_version, cache_is_shared, get_schedule_version
 from ..models import Task
 
 logger = logging.getLogger(__name__)
 
+FRAGMENT_CACHE_TIMEOUT = 60 * 5
+
 
 @login_required
 @require_POST
@@ -21,49 +25,60 @@ def update_task_status(request):
     
     if not task_id or not new_status:
         return JsonResponse({'error': 'Missing required fields'}, status=400)
+    if not task_id.isdigit():
+        return JsonResponse({'error': 'Invalid task ID'}, status=400)
     
-    try:
-        task = get_object_or_404(Task, id=task_id, user=request.user)
-        old_status = task.status
-        task.status = new_status
-        
-        # If marked as completed, set completion time and log completion
-        if new_status == 'completed' and old_status != 'completed':
-            task.completed_at = timezone.now()
-            if not task.actual_hours and task.is_scheduled:
-                task.actual_hours = task.duration_hours
-        elif new_status != 'completed' and old_status == 'completed':
-            # If unmarking as completed, clear completion time
-            task.completed_at = None
-        
-        task.save()
-        
-        return JsonResponse({'success': True, 'status': new_status})
-    
-    except Task.DoesNotExist:
+    task = Task.objects.for_user(request.user).filter(id=task_id).first()
+    if task is None:
         return JsonResponse({'error': 'Task not found'}, status=404)
-    except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+    
+    old_status = task.status
+    task.status = new_status
+    
+    # If marked as completed, set completion time and log completion
+    if new_status == 'completed' and old_status != 'completed':
+        task.completed_at = timezone.now()
+        if not task.actual_hours and task.is_scheduled:
+            task.actual_hours = task.duration_hours
+    elif new_status != 'completed' and old_status == 'completed':
+        # If unmarking as completed, clear completion time
+        task.completed_at = None
+    
+    task.save(update_fields=['status', 'completed_at', 'actual_hours', 'updated_at'])
+    
+    return JsonResponse({'success': True})
 
 
 @login_required
 @require_POST
 def toggle_task_status(request, pk):
     """Toggle task status between todo/in_progress/completed."""
-    task = get_object_or_404(Task, pk=pk, user=request.user)
-    
-    old_status = task.status
-    status_cycle = {'todo': 'in_progress', 'in_progress': 'completed', 'completed': 'todo'}
-    task.status = status_cycle.get(task.status, 'todo')
-    
-    # Handle completion timestamp
-    if task.status == 'completed' and old_status != 'completed':
-        task.completed_at = timezone.now()
-    elif task.status != 'completed' and old_status == 'completed':
-        task.completed_at = None
+    now = timezone.now()
+    # Cycle the status in a single UPDATE so concurrent clicks can't race.
+    # completed_at must be assigned first: MySQL evaluates SET left to right,
+    # so a CASE placed after status= would read the new status.
+    updated = Task.objects.for_user(request.user).filter(pk=pk).update(
+        completed_at=Case(
+            When(status='in_progress', then=Value(now)),
+            When(status='completed', then=Value(None)),
+            default=F('completed_at'),
+        ),
+        status=Case(
+            When(status='todo', then=Value('in_progress')),
+            When(status='in_progress', then=Value('completed')),
+            default=Value('todo'),
+        ),
+        updated_at=now,
+    )
+    if not updated:
+        raise Http404('No Task matches the given query.')
+    bump_schedule_version(request.user.id)
     
-    task.save()
+    # Only HTMX swaps the card back in; plain fetch callers just need the status
+    if not request.headers.get('HX-Request'):
+        return HttpResponse(status=204)
     
+    task = Task.objects.only(*Task.CARD_FIELDS).get(pk=pk)
     return render(request, 'planner/partials/task_card.html', {'task': task})
 
 
@@ -71,10 +86,18 @@ def toggle_task_status(request, pk):
 @require_POST
 def toggle_task_lock(request, pk):
     """Toggle task lock status."""
-    task = get_object_or_404(Task, pk=pk, user=request.user)
-    task.is_locked = not task.is_locked
-    task.save()
+    updated = Task.objects.for_user(request.user).filter(pk=pk).update(
+        is_locked=~F('is_locked'), updated_at=timezone.now()
+    )
+    if not updated:
+        raise Http404('No Task matches the given query.')
+    bump_schedule_version(request.user.id)
+    
+    # Only HTMX swaps the card back in; plain fetch callers just need the status
+    if not request.headers.get('HX-Request'):
+        return HttpResponse(status=204)
     
+    task = Task.objects.only(*Task.CARD_FIELDS).get(pk=pk)
     return render(request, 'planner/partials/task_card.html', {'task': task})
 
 
@@ -88,34 +111,38 @@ def update_task_time(request):
     
     if not all([task_id, start_time_str, end_time_str]):
         return JsonResponse({'error': 'Missing required fields'}, status=400)
+    if not task_id.isdigit():
+        return JsonResponse({'error': 'Invalid task ID'}, status=400)
     
     try:
-        task = get_object_or_404(Task, id=task_id, user=request.user)
+        # Parse datetime strings; fromisoformat accepts the 'Z' suffix natively
+        start_time = datetime.fromisoformat(start_time_str)
+        end_time = datetime.fromisoformat(end_time_str)
         
-        # Parse datetime strings
-        start_time = datetime.fromisoformat(start_time_str.replace('Z', '+00:00'))
-        end_time = datetime.fromisoformat(end_time_str.replace('Z', '+00:00'))
+        # Update task in one statement; the row count doubles as the ownership check
+        updated = Task.objects.for_user(request.user).filter(id=task_id).update(
+            start_time=start_time,
+            end_time=end_time,
+            is_locked=True,  # Auto-lock manually moved tasks
+            updated_at=timezone.now(),
+        )
+        if not updated:
+            return JsonResponse({'error': 'Task not found'}, status=404)
         
-        # Update task
-        task.start_time = start_time
-        task.end_time = end_time
-        task.is_locked = True  # Auto-lock manually moved tasks
-        task.save()
+        # update() skips the Task signals, so do their work here
+        bump_schedule_version(request.user.id)
+        async_task('planner.services.notification_service.refresh_task_reminders', int(task_id))
         
         return JsonResponse({'success': True})
     
-    except Task.DoesNotExist:
-        return JsonResponse({'error': 'Task not found'}, status=404)
     except ValueError:
         return JsonResponse({'error': 'Invalid datetime format'}, status=400)
-    except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
 
 
 @login_required
 def task_card_partial(request, pk):
     """Return a single task card partial."""
-    task = get_object_or_404(Task, pk=pk, user=request.user)
+    task = get_object_or_404(Task.objects.for_user(request.user).only(*Task.CARD_FIELDS), pk=pk)
     return render(request, 'planner/partials/task_card.html', {'task': task})
 
 
@@ -125,8 +152,16 @@ def unscheduled_tasks_partial(request):
     tasks = request.user.tasks.filter(
         status__in=['todo', 'in_progress'],
         start_time__isnull=True
-    )
-    return render(request, 'planner/partials/unscheduled_tasks.html', {'tasks': tasks})
+    ).only(*Task.CARD_FIELDS)
+    # The queryset stays lazy: on a fragment-cache hit it is never evaluated,
+    # otherwise the template's loop and length checks share one query.
+    # A timeout of 0 disables the fragment cache when versions are per-process.
+    return render(request, 'planner/partials/unscheduled_tasks.html', {
+        'tasks': tasks,
+        'user_id': request.user.id,
+        'schedule_version': get_schedule_version(request.user.id),
+        'fragment_cache_timeout': FRAGMENT_CACHE_TIMEOUT if cache_is_shared() else 0,
+    })
 
 
 @login_required
@@ -2,11 +2,50 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import TemplateView
 from django.utils import timezone
+from django.core.cache import cache
+from django.urls import reverse
 import logging
+from collections import defaultdict
 from datetime import datetime, timedelta
+from functools import lru_cache
+
+from ..caching import cache_is_shared, get_schedule_version
+from ..models import GoogleCalendarIntegration, Task
 
 logger = logging.getLogger(__name__)
 
+CALENDAR_CACHE_TIMEOUT = 60 * 5
+
+
+def _format_hour(hour):
+    """Label for an hour row in the calendar grid."""
+    if hour == 0:
+        return "12 AM"
+    elif hour < 12:
+        return f"{hour}:00 AM"
+    elif hour == 12:
+        return "12 PM"
+    return f"{hour - 12}:00 PM"
+
+
+# Hour rows for the calendar display (6 AM to 11 PM)
+CALENDAR_HOURS = tuple({'hour': hour, 'label': _format_hour(hour)} for hour in range(6, 24))
+
+
+@lru_cache(maxsize=8)
+def _week_days(week_start):
+    """Static per-day labels for the week starting on week_start."""
+    days = []
+    for i in range(7):
+        day = week_start + timedelta(days=i)
+        days.append({
+            'date': day,
+            'day_name': day.strftime('%A'),
+            'day_short': day.strftime('%a'),
+            'day_num': day.day,
+        })
+    return tuple(days)
+
 
 class CalendarView(LoginRequiredMixin, TemplateView):
     template_name = 'planner/calendar.html'
@@ -28,70 +67,19 @@ class CalendarView(LoginRequiredMixin, TemplateView):
         week_start = base_date - timedelta(days=base_date.weekday())
         week_end = week_start + timedelta(days=6)
         
-        # Get user's tasks for this week using datetime range instead of date range
-        # to avoid MySQL timezone conversion issues
-        week_start_dt = timezone.make_aware(datetime.combine(week_start, datetime.min.time()))
-        week_end_dt = timezone.make_aware(datetime.combine(week_end, datetime.max.time()))
-        
-        scheduled_tasks = self.request.user.tasks.filter(
-            start_time__gte=week_start_dt,
-            start_time__lte=week_end_dt
-        ).order_by('start_time')
-
-        unscheduled_tasks = self.request.user.tasks.filter(
-            start_time__isnull=True,
-            status__in=['todo', 'in_progress']
-        ).order_by('deadline')
+        scheduled_tasks, unscheduled_tasks, tasks_by_day = self._get_week_tasks(week_start, week_end)
 
         # Generate week days with tasks
-        week_days = []
         today = timezone.now().date()
-        for i in range(7):
-            day = week_start + timedelta(days=i)
-            # Filter tasks for this day from the already-fetched scheduled_tasks
-            # to avoid timezone conversion issues
-            day_tasks = []
-            for task in scheduled_tasks:
-                if task.start_time.date() == day:
-                    # Convert UTC time to local timezone for positioning
-                    local_start_time = task.start_time
-                    if timezone.is_aware(local_start_time):
-                        # Convert to the Django configured timezone
-                        local_start_time = timezone.localtime(local_start_time)
-                    
-                    # Calculate task position (6 AM = position 0)
-                    task_hour = local_start_time.hour
-                    task_minute = local_start_time.minute
-                    
-                    # Position relative to 6 AM (our first hour) 
-                    # Each hour slot is 4rem tall
-                    if task_hour >= 6:  # Only show tasks from 6 AM onwards
-                        position_hours = task_hour - 6  # Hours since 6 AM
-                        position_minutes = task_minute / 60.0  # Convert minutes to decimal hours
-                        task_top = (position_hours + position_minutes) * 4  # 4rem per hour
-                        
-                        # Task height based on estimated hours
-                        task_height = float(task.estimated_hours) * 4  # 4rem per hour
-                        
-                        # Add positioning data to task
-                        task.position_top = task_top
-                        task.position_height = task_height
-                        day_tasks.append(task)
-            
-            week_days.append({
-                'date': day,
-                'day_name': day.strftime('%A'),
-                'day_short': day.strftime('%a'),
-                'day_num': day.day,
-                'is_today': day == today,
-                'tasks': day_tasks
-            })
-
-        # Check Google Calendar integration
-        from ..models import GoogleCalendarIntegration
+        week_days = [
+            {**day, 'is_today': day['date'] == today, 'tasks': day_tasks}
+            for day, day_tasks in zip(_week_days(week_start), tasks_by_day)
+        ]
+
+        # Check Google Calendar integration; the template only reads is_enabled
         google_integration = GoogleCalendarIntegration.objects.filter(
             user=self.request.user
-        ).first()
+        ).only('id', 'is_enabled').first()
         
         # Auto-sync disabled - user preference
         # Note: Auto-sync can be re-enabled by uncommenting the code below
@@ -104,34 +92,82 @@ class CalendarView(LoginRequiredMixin, TemplateView):
         prev_week = week_start - timedelta(days=7)
         next_week = week_start + timedelta(days=7)
         
-        # Generate hour range for calendar display (6 AM to 11 PM)
-        hours = []
-        for hour in range(6, 24):  # 6 AM to 11 PM
-            if hour == 0:
-                time_label = "12 AM"
-            elif hour < 12:
-                time_label = f"{hour}:00 AM"
-            elif hour == 12:
-                time_label = "12 PM"
-            else:
-                time_label = f"{hour - 12}:00 PM"
-            
-            hours.append({
-                'hour': hour,
-                'label': time_label
-            })
-
         context.update({
             'week_start': week_start,
             'week_end': week_end,
             'prev_week': prev_week,
             'next_week': next_week,
             'week_days': week_days,
-            'hours': hours,
+            'hours': CALENDAR_HOURS,
             'scheduled_tasks': scheduled_tasks,
             'unscheduled_tasks': unscheduled_tasks,
             'google_integration': google_integration,
             'has_google_calendar': google_integration is not None,
         })
         
+        # A background reoptimize_schedule redirects here with its job to poll
+        reoptimize_job = self.request.GET.get('reoptimize_job', '')
+        if reoptimize_job.isalnum():
+            context['reoptimize_status_url'] = reverse('planner:reoptimize_schedule_status', args=[reoptimize_job])
+        
         return context
+
+    def _get_week_tasks(self, week_start, week_end):
+        """
+        Return (scheduled_tasks, unscheduled_tasks, tasks_by_day) for the week.
+        Cached per user and schedule version when the cache is shared, so
+        re-GETs skip the queries and positioning pass until a task or time
+        block changes.
+        """
+        user = self.request.user
+        use_cache = cache_is_shared()
+        if use_cache:
+            cache_key = f'calendar:{user.id}:{get_schedule_version(user.id)}:{week_start.isoformat()}'
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        # Get user's tasks for this week using datetime range instead of date range
+        # to avoid MySQL timezone conversion issues
+        week_start_dt = timezone.make_aware(datetime.combine(week_start, datetime.min.time()))
+        week_end_dt = timezone.make_aware(datetime.combine(week_end, datetime.max.time()))
+        
+        scheduled_tasks = list(user.tasks.filter(
+            start_time__gte=week_start_dt,
+            start_time__lte=week_end_dt
+        ).only(*Task.CALENDAR_FIELDS).order_by('start_time'))
+
+        unscheduled_tasks = list(user.tasks.filter(
+            start_time__isnull=True,
+            status__in=['todo', 'in_progress']
+        ).only(*Task.CALENDAR_FIELDS).order_by('deadline'))
+
+        # Bucket tasks by local day in a single pass over scheduled_tasks
+        tasks_by_date = defaultdict(list)
+        for task in scheduled_tasks:
+            # Convert UTC time to local timezone for positioning
+            local_start_time = task.start_time
+            if timezone.is_aware(local_start_time):
+                # Convert to the Django configured timezone
+                local_start_time = timezone.localtime(local_start_time)
+            
+            # Position relative to 6 AM (our first hour)
+            # Each hour slot is 4rem tall
+            if local_start_time.hour >= 6:  # Only show tasks from 6 AM onwards
+                position_hours = local_start_time.hour - 6  # Hours since 6 AM
+                position_minutes = local_start_time.minute / 60.0  # Convert minutes to decimal hours
+                
+                # Add positioning data to task; height is based on estimated hours
+                task.position_top = (position_hours + position_minutes) * 4  # 4rem per hour
+                task.position_height = float(task.estimated_hours) * 4  # 4rem per hour
+                tasks_by_date[local_start_time.date()].append(task)
+
+        tasks_by_day = [
+            tasks_by_date.get(week_start + timedelta(days=i), [])
+            for i in range(7)
+        ]
+
+        result = (scheduled_tasks, unscheduled_tasks, tasks_by_day)
+        if use_cache:
+            cache.set(cache_key, result, CALENDAR_CACHE_TIMEOUT)
+        return result
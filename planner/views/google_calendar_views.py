@@ -2,17 +2,39 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import TemplateView
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.views.decorators.http import require_POST
 from django.contrib import messages
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
 from django.utils import timezone
+from django_q.tasks import async_task
 from datetime import datetime, timedelta
+from uuid import uuid4
+import hashlib
 import logging
 
+from allauth.socialaccount.models import SocialToken
+
+from ..caching import (
+    GOOGLE_TOKEN_TIMEOUT,
+    SYNC_STATUS_CACHE_TIMEOUT,
+    cache_is_shared,
+    google_token_key,
+    sync_status_key,
+)
+from ..models import CalendarSyncLog, GoogleCalendarIntegration, SyncLock
+from ..services.google_calendar_service import SYNC_STATUS_TIMEOUT, google_sync_task, sync_job_status_key
+
 logger = logging.getLogger(__name__)
 
-# Global request counter for debugging
-sync_request_counter = 0
+SYNC_TYPE_LABELS = dict(CalendarSyncLog.SYNC_TYPES)
+
+_SYNC_STATUS_ERROR = JsonResponse({'success': False, 'message': 'Failed to get sync status'}).content
 
 
 class GoogleCalendarSettingsView(LoginRequiredMixin, TemplateView):
@@ -22,15 +44,12 @@ class GoogleCalendarSettingsView(LoginRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        try:
-            from ..models import GoogleCalendarIntegration, CalendarSyncLog
-            integration = GoogleCalendarIntegration.objects.get(user=self.request.user)
-        except:
-            integration = None
+        integration = GoogleCalendarIntegration.objects.filter(
+            user=self.request.user
+        ).only('id', 'google_calendar_id', 'is_enabled', 'last_sync', 'sync_direction').first()
         
         # Get recent sync logs
         try:
-            from ..models import CalendarSyncLog
             sync_logs = CalendarSyncLog.objects.filter(
                 user=self.request.user
             )[:10]
@@ -47,122 +66,114 @@ class GoogleCalendarSettingsView(LoginRequiredMixin, TemplateView):
     
     def _has_google_token(self):
         """Check if user has valid Google OAuth token."""
-        from allauth.socialaccount.models import SocialToken
-        return SocialToken.objects.filter(
-            account__user=self.request.user,
-            account__provider='google'
-        ).exists()
+        return cache.get_or_set(
+            google_token_key(self.request.user.id),
+            lambda: SocialToken.objects.filter(
+                account__user=self.request.user,
+                account__provider='google'
+            ).exists(),
+            GOOGLE_TOKEN_TIMEOUT
+        )
     
     def post(self, request, *args, **kwargs):
         """Handle settings updates."""
         try:
-            from ..models import GoogleCalendarIntegration
-            integration, created = GoogleCalendarIntegration.objects.get_or_create(
-                user=request.user
+            # Update settings in one upsert. MySQL picks the conflicting unique
+            # key itself and rejects an explicit target.
+            GoogleCalendarIntegration.objects.bulk_create(
+                [GoogleCalendarIntegration(
+                    user=request.user,
+                    is_enabled=request.POST.get('is_enabled') == 'on',
+                    sync_direction=request.POST.get('sync_direction', 'both'),
+                )],
+                update_conflicts=True,
+                unique_fields=['user'] if connection.features.supports_update_conflicts_with_target else None,
+                update_fields=['is_enabled', 'sync_direction', 'updated_at'],
             )
             
-            # Update settings
-            integration.is_enabled = request.POST.get('is_enabled') == 'on'
-            integration.sync_direction = request.POST.get('sync_direction', 'both')
-            integration.save()
+            # bulk_create skips the post_save handler that expires the cached sync status
+            cache.delete(sync_status_key(request.user.id))
             
             messages.success(request, 'Google Calendar settings updated successfully!')
             
-        except Exception as e:
-            logger.error(f"Error updating Google Calendar settings: {e}")
+        except Exception:
+            logger.exception("Error updating Google Calendar settings")
             messages.error(request, 'Failed to update settings. Please try again.')
         
         return redirect('planner:google_calendar_settings')
 
 
-@login_required
-@require_POST
-def sync_to_google(request):
-    """Sync tasks to Google Calendar."""
-    global sync_request_counter
-    sync_request_counter += 1
-    current_count = sync_request_counter
-    
-    # Get request ID from headers (if sent by client)
-    request_id = request.META.get('HTTP_X_REQUEST_ID', f'server-{current_count}')
-    
-    # COMPLETELY BLOCK AUTO-SYNC - Only allow manual sync
-    user_agent = request.META.get('HTTP_USER_AGENT', '')
-    referer = request.META.get('HTTP_REFERER', '')
-    request_method = request.method
-    request_path = request.get_full_path()
-    
-    logger.info(f"SYNC DEBUG: sync_to_google called #{current_count} (Request ID: {request_id}) for user {request.user.id} from IP {request.META.get('REMOTE_ADDR')}")
-    logger.info(f"SYNC DEBUG: Method: {request_method}, Path: {request_path}")
-    logger.info(f"SYNC DEBUG: User-Agent: {user_agent[:100]}...")
-    logger.info(f"SYNC DEBUG: Referer: {referer}")
-    logger.info(f"SYNC DEBUG: POST data: {dict(request.POST)}")
-    logger.info(f"SYNC DEBUG: Headers: {dict(request.headers)}")
-    
-    from ..models import SyncLock
-    
-    # Try to acquire sync lock with longer timeout to prevent browser retries
-    lock_acquired, lock_instance = SyncLock.acquire_lock(request.user, timeout_minutes=10)
+def _start_sync_job(request, operation, timeout_minutes, start_date=None, end_date=None):
+    """
+    Queue a background Google sync and return its job id to poll.
+    The SyncLock stores the job id, so repeat submissions while it is held
+    are pointed at the job already running instead of starting another.
+    Without a shared cache the sync runs within the request instead, since
+    the cluster's job status would never reach the web workers.
+    """
+    job_id = uuid4().hex
+    shared = cache_is_shared()
+    if shared:
+        # Publish the pending state first so a duplicate request never polls a missing job
+        cache.set(sync_job_status_key(request.user.id, job_id), {'state': 'pending'}, SYNC_STATUS_TIMEOUT)
+    lock_acquired, lock_instance = SyncLock.acquire_lock(
+        request.user, timeout_minutes=timeout_minutes, process_id=job_id
+    )
     if not lock_acquired:
-        logger.warning(f"SYNC DEBUG: sync_to_google #{current_count} (Request ID: {request_id}) BLOCKED - lock already exists for user {request.user.id}")
-        return JsonResponse({
-            'success': False,
-            'message': 'Another sync operation is already in progress. Please wait for it to complete.',
-            'request_id': request_id
-        })
-    
-    logger.info(f"SYNC DEBUG: sync_to_google #{current_count} (Request ID: {request_id}) PROCEEDING for user {request.user.id}")
-    try:
-        from ..services.google_calendar_service import GoogleCalendarService
-        service = GoogleCalendarService(request.user)
-        result = service.sync_tasks_to_google()
-        
-        if result['success']:
-            message = f"Sync completed! Created {result['events_created']} events, updated {result['events_updated']} events."
-            if result['errors']:
-                message += f" {len(result['errors'])} errors occurred."
-            
+        if shared and lock_instance and lock_instance.process_id:
+            logger.debug(
+                "SYNC DEBUG: %s for user %s joined running job %s",
+                operation, request.user.id, lock_instance.process_id
+            )
             return JsonResponse({
                 'success': True,
-                'message': message,
-                'events_created': result['events_created'],
-                'events_updated': result['events_updated'],
-                'errors': result['errors']
-            })
-        else:
-            return JsonResponse({
-                'success': False,
-                'message': 'Sync failed. Please check your Google Calendar connection.'
+                'state': 'pending',
+                'task_id': lock_instance.process_id,
+                'status_url': reverse('planner:google_sync_job_status', args=[lock_instance.process_id]),
             })
-            
-    except Exception as e:
-        logger.error(f"Error syncing to Google Calendar: {e}")
         return JsonResponse({
             'success': False,
-            'message': f'Sync failed: {str(e)}'
+            'message': 'Another sync operation is already in progress. Please wait for it to complete.'
         })
-    finally:
-        # Always release the sync lock
-        logger.info(f"SYNC DEBUG: sync_to_google #{current_count} (Request ID: {request_id}) FINISHED - releasing lock for user {request.user.id}")
-        SyncLock.release_lock(request.user)
+    
+    if not shared:
+        return JsonResponse(google_sync_task(request.user.id, job_id, operation, start_date, end_date))
+    
+    async_task(
+        'planner.services.google_calendar_service.google_sync_task',
+        request.user.id, job_id, operation, start_date, end_date
+    )
+    
+    return JsonResponse({
+        'success': True,
+        'state': 'pending',
+        'task_id': job_id,
+        'status_url': reverse('planner:google_sync_job_status', args=[job_id]),
+    })
 
 
 @login_required
 @require_POST
-def sync_from_google(request):
-    """Sync events from Google Calendar."""
-    from ..models import SyncLock
+def sync_to_google(request):
+    """Start syncing tasks to Google Calendar in the background."""
+    # Get request ID from headers (if sent by client)
+    request_id = request.META.get('HTTP_X_REQUEST_ID') or uuid4().hex
     
-    # Try to acquire sync lock
-    lock_acquired, lock_instance = SyncLock.acquire_lock(request.user, timeout_minutes=5)
-    if not lock_acquired:
-        return JsonResponse({
-            'success': False,
-            'message': 'Another sync operation is already in progress. Please wait for it to complete.'
-        })
+    logger.debug(
+        "SYNC DEBUG: sync_to_google called (Request ID: %s) for user %s from IP %s",
+        request_id, request.user.id, request.META.get('REMOTE_ADDR')
+    )
     
+    # Longer lock timeout to prevent browser retries
+    return _start_sync_job(request, 'to_google', timeout_minutes=10)
+
+
+@login_required
+@require_POST
+def sync_from_google(request):
+    """Start importing events from Google Calendar in the background."""
+    # Get date range from request
     try:
-        # Get date range from request
         start_date = request.POST.get('start_date')
         end_date = request.POST.get('end_date')
         
@@ -177,128 +188,80 @@ def sync_from_google(request):
             end_date = timezone.make_aware(end_date)
         else:
             end_date = start_date + timedelta(days=30)
-        
-        from ..services.google_calendar_service import GoogleCalendarService
-        service = GoogleCalendarService(request.user)
-        result = service.sync_from_google(start_date, end_date)
-        
-        if result['success']:
-            message = f"Sync completed! Imported {result['events_created']} events, updated {result['events_updated']} tasks."
-            if result['errors']:
-                message += f" {len(result['errors'])} errors occurred."
-            
-            return JsonResponse({
-                'success': True,
-                'message': message,
-                'events_created': result['events_created'],
-                'events_updated': result['events_updated'],
-                'errors': result['errors']
-            })
-        else:
-            return JsonResponse({
-                'success': False,
-                'message': 'Sync failed. Please check your Google Calendar connection.'
-            })
-            
-    except Exception as e:
-        logger.error(f"Error syncing from Google Calendar: {e}")
+    except ValueError as e:
         return JsonResponse({
             'success': False,
             'message': f'Sync failed: {str(e)}'
-        })
-    finally:
-        # Always release the sync lock
-        SyncLock.release_lock(request.user)
+        }, status=400)
+    
+    return _start_sync_job(request, 'from_google', timeout_minutes=5, start_date=start_date, end_date=end_date)
 
 
 @login_required
 @require_POST
 def full_sync(request):
-    """Perform a full two-way sync."""
-    global sync_request_counter
-    sync_request_counter += 1
-    current_count = sync_request_counter
+    """Start a full two-way sync in the background."""
+    request_id = request.META.get('HTTP_X_REQUEST_ID') or uuid4().hex
     
-    logger.info(f"SYNC DEBUG: full_sync called #{current_count} for user {request.user.id} from IP {request.META.get('REMOTE_ADDR')}")
-    from ..models import SyncLock
-    
-    # Try to acquire sync lock with longer timeout for full sync
-    lock_acquired, lock_instance = SyncLock.acquire_lock(request.user, timeout_minutes=10)
-    if not lock_acquired:
-        logger.warning(f"SYNC DEBUG: full_sync #{current_count} BLOCKED - lock already exists for user {request.user.id}")
-        return JsonResponse({
-            'success': False,
-            'message': 'Another sync operation is already in progress. Please wait for it to complete.'
-        })
+    logger.debug(
+        "SYNC DEBUG: full_sync called (Request ID: %s) for user %s from IP %s",
+        request_id, request.user.id, request.META.get('REMOTE_ADDR')
+    )
     
-    logger.info(f"SYNC DEBUG: full_sync #{current_count} PROCEEDING for user {request.user.id}")
-    try:
-        from ..services.google_calendar_service import GoogleCalendarService
-        service = GoogleCalendarService(request.user)
-        
-        # First sync tasks to Google
-        to_google_result = service.sync_tasks_to_google()
-        
-        # Then sync from Google
-        from_google_result = service.sync_from_google()
-        
-        if to_google_result['success'] and from_google_result['success']:
-            message = (
-                f"Full sync completed! "
-                f"To Google: {to_google_result['events_created']} created, {to_google_result['events_updated']} updated. "
-                f"From Google: {from_google_result['events_created']} imported, {from_google_result['events_updated']} updated."
-            )
-            
-            total_errors = to_google_result['errors'] + from_google_result['errors']
-            if total_errors:
-                message += f" {len(total_errors)} errors occurred."
-            
-            return JsonResponse({
-                'success': True,
-                'message': message,
-                'to_google': to_google_result,
-                'from_google': from_google_result,
-                'errors': total_errors
-            })
-        else:
-            return JsonResponse({
-                'success': False,
-                'message': 'Full sync partially failed. Please check sync logs.'
-            })
-            
-    except Exception as e:
-        logger.error(f"Error performing full sync: {e}")
-        return JsonResponse({
-            'success': False,
-            'message': f'Full sync failed: {str(e)}'
-        })
-    finally:
-        # Always release the sync lock
-        logger.info(f"SYNC DEBUG: full_sync #{current_count} FINISHED - releasing lock for user {request.user.id}")
-        SyncLock.release_lock(request.user)
+    # Longer lock timeout for full sync
+    return _start_sync_job(request, 'full', timeout_minutes=10)
+
+
+@login_required
+def google_sync_job_status(request, task_id):
+    """Report the state of a background Google sync, with its result once finished."""
+    status = cache.get(sync_job_status_key(request.user.id, task_id))
+    if status is None:
+        return JsonResponse({'state': 'unknown', 'success': False, 'message': 'Sync not found'}, status=404)
+    return JsonResponse(status)
+
+
+def _conditional_json(request, content):
+    """JSON response tagged with an ETag of its body, or a 304 if the client already has it."""
+    etag = quote_etag(hashlib.md5(content, usedforsecurity=False).hexdigest())
+    response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return get_conditional_response(request, etag=etag, response=response)
 
 
 @login_required
 def sync_status(request):
     """Get sync status and recent logs."""
+    # Sync logs are written by the Django-Q2 cluster, whose invalidation only
+    # reaches this process through a shared cache; otherwise always rebuild
+    use_cache = cache_is_shared()
+    cache_key = sync_status_key(request.user.id)
+    content = cache.get(cache_key) if use_cache else None
+    if content is not None:
+        return _conditional_json(request, content)
+    
     try:
-        from ..models import GoogleCalendarIntegration, CalendarSyncLog
-        integration = GoogleCalendarIntegration.objects.filter(user=request.user).first()
-        recent_logs = CalendarSyncLog.objects.filter(user=request.user)[:5]
+        integration = GoogleCalendarIntegration.objects.filter(user=request.user).only(
+            'id', 'is_enabled', 'last_sync', 'sync_direction'
+        ).first()
+        recent_logs = CalendarSyncLog.objects.filter(user=request.user).values(
+            'id', 'sync_type', 'status', 'timestamp', 'events_synced', 'error_message', 'sync_duration'
+        )[:5]
         
         logs_data = []
         for log in recent_logs:
             logs_data.append({
-                'id': log.id,
-                'sync_type': log.get_sync_type_display(),
-                'status': log.status,
-                'timestamp': log.timestamp.isoformat(),
-                'events_synced': log.events_synced,
-                'error_message': log.error_message,
-                'duration': str(log.sync_duration) if log.sync_duration else None
+                'id': log['id'],
+                'sync_type': SYNC_TYPE_LABELS.get(log['sync_type'], log['sync_type']),
+                'status': log['status'],
+                'timestamp': log['timestamp'].isoformat(),
+                'events_synced': log['events_synced'],
+                'error_message': log['error_message'],
+                'duration': str(log['sync_duration']) if log['sync_duration'] else None
             })
         
-        return JsonResponse({
+        data = {
             'success': True,
             'integration': {
                 'is_enabled': integration.is_enabled if integration else False,
@@ -306,14 +269,15 @@ def sync_status(request):
                 'sync_direction': integration.sync_direction if integration else 'both'
             },
             'recent_logs': logs_data
-        })
+        }
+        content = JsonResponse(data).content
+        if use_cache:
+            cache.set(cache_key, content, SYNC_STATUS_CACHE_TIMEOUT)
+        return _conditional_json(request, content)
         
-    except Exception as e:
-        logger.error(f"Error getting sync status: {e}")
-        return JsonResponse({
-            'success': False,
-            'message': f'Failed to get sync status: {str(e)}'
-        })
+    except Exception:
+        logger.exception("Error getting sync status")
+        return HttpResponse(_SYNC_STATUS_ERROR, content_type='application/json', status=500)
 
 
 @login_required
@@ -321,25 +285,28 @@ def sync_status(request):
 def toggle_auto_sync(request):
     """Enable/disable automatic syncing."""
     try:
-        from ..models import GoogleCalendarIntegration
-        integration, created = GoogleCalendarIntegration.objects.get_or_create(
-            user=request.user
-        )
+        # Flip the flag in SQL so concurrent toggles can't overwrite each other
+        integrations = GoogleCalendarIntegration.objects.filter(user=request.user)
+        if integrations.update(is_enabled=~Q(is_enabled=True), updated_at=timezone.now()):
+            is_enabled = integrations.values_list('is_enabled', flat=True).get()
+        else:
+            # A new integration starts enabled, so the first toggle disables it
+            is_enabled = GoogleCalendarIntegration.objects.create(user=request.user, is_enabled=False).is_enabled
         
-        integration.is_enabled = not integration.is_enabled
-        integration.save()
+        # update() skips the post_save handler that expires the cached sync status
+        cache.delete(sync_status_key(request.user.id))
         
         return JsonResponse({
             'success': True,
-            'is_enabled': integration.is_enabled,
-            'message': f"Auto-sync {'enabled' if integration.is_enabled else 'disabled'}"
+            'is_enabled': is_enabled,
+            'message': f"Auto-sync {'enabled' if is_enabled else 'disabled'}"
         })
         
-    except Exception as e:
-        logger.error(f"Error toggling auto-sync: {e}")
+    except Exception:
+        logger.exception("Error toggling auto-sync")
         return JsonResponse({
             'success': False,
-            'message': f'Failed to toggle auto-sync: {str(e)}'
+            'message': 'Failed to toggle auto-sync'
         })
 
 
@@ -350,11 +317,9 @@ class GoogleConnectionView(LoginRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        try:
-            from ..models import GoogleCalendarIntegration
-            integration = GoogleCalendarIntegration.objects.get(user=self.request.user)
-        except:
-            integration = None
+        integration = GoogleCalendarIntegration.objects.filter(
+            user=self.request.user
+        ).only('id', 'is_enabled').first()
         
         context.update({
             'integration': integration,
@@ -45,7 +45,7 @@ def get_notifications(request):
         from ..models import TaskNotification
         
         # Get recent notifications (sent in the last 24 hours) for display
-        recent_notifications = TaskNotification.objects.filter(
+        recent_notifications = TaskNotification.objects.select_related('task').filter(
             task__user=request.user,
             status='sent',
             sent_time__gte=timezone.now() - timedelta(hours=24)
@@ -18,6 +18,9 @@ from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from ..models import Task, TimeBlock
 from ..forms import PdfScheduleForm
 
+# Columns rendered into the PDF schedule tables
+PDF_TASK_FIELDS = ('id', 'title', 'priority', 'deadline', 'estimated_hours', 'start_time', 'end_time')
+
 
 class SchedulePdfFormView(LoginRequiredMixin, TemplateView):
     """View for displaying the PDF export form."""
@@ -137,11 +140,11 @@ class SchedulePdfGenerateView(LoginRequiredMixin, View):
             start_time__isnull=False,
             start_time__gte=start_datetime,
             start_time__lte=end_datetime
-        ).order_by('start_time')
+        ).only(*PDF_TASK_FIELDS).order_by('start_time')
         
-        # Group tasks by date
+        # Group tasks by date, streaming rows instead of caching the queryset
         tasks_by_date = defaultdict(list)
-        for task in scheduled_tasks:
+        for task in scheduled_tasks.iterator(chunk_size=500):
             task_date = task.start_time.date()
             tasks_by_date[task_date].append(task)
         
@@ -152,7 +155,7 @@ class SchedulePdfGenerateView(LoginRequiredMixin, View):
             status__in=['todo', 'in_progress'],
             deadline__gte=start_datetime,
             deadline__lte=end_datetime
-        ).order_by('deadline', 'priority')
+        ).only(*PDF_TASK_FIELDS).order_by('deadline', 'priority')
         
         # Generate calendar for each day
         current_date = start_date
@@ -5,13 +5,22 @@ from django.views.generic import TemplateView
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.utils import timezone
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
 from datetime import datetime, timedelta
 import logging
 
+from ..caching import cache_is_shared
 from ..models import Task, PomodoroSession
 
 logger = logging.getLogger(__name__)
 
+# Newest sessions fetched for the timer page's active/recent/today panels
+SESSION_WINDOW = 50
+# Today's focus-session counters outlive the day they count
+FOCUS_COUNT_TIMEOUT = 60 * 60 * 36
+
 
 class PomodoroTimerView(LoginRequiredMixin, TemplateView):
     """Pomodoro timer interface."""
@@ -39,33 +48,51 @@ class PomodoroTimerView(LoginRequiredMixin, TemplateView):
         # Get user's active/in-progress tasks for the timer
         available_tasks = self.request.user.tasks.filter(
             status__in=['todo', 'in_progress']
-        ).order_by('deadline')
-        
-        # Get current active session if any
-        active_session = PomodoroSession.objects.filter(
-            task__user=self.request.user,
-            status='active'
-        ).first()
+        ).only(*Task.CARD_FIELDS).order_by('deadline')
         
-        # Get recent sessions for history
-        recent_sessions = PomodoroSession.objects.filter(
+        # One query for the newest sessions; active, recent and today's stats
+        # are all read from it
+        sessions = list(PomodoroSession.objects.filter(
             task__user=self.request.user
-        ).select_related('task')[:10]
+        ).select_related('task')[:SESSION_WINDOW])
+        
+        active_session = next((session for session in sessions if session.status == 'active'), None)
+        recent_sessions = sessions[:10]
         
         # Calculate today's stats
         today = timezone.now().date()
-        today_sessions = PomodoroSession.objects.filter(
-            task__user=self.request.user,
-            start_time__date=today,
-            status='completed'
-        )
+        today_sessions = [
+            session for session in sessions
+            if session.status == 'completed' and timezone.localtime(session.start_time).date() == today
+        ]
+        today_stats = {
+            'focus_time': sum(session.actual_duration or 0 for session in today_sessions),
+            'sessions_count': len(today_sessions),
+        }
+        
+        # A full window may not reach back far enough; fall back to querying
+        if len(sessions) == SESSION_WINDOW:
+            if active_session is None:
+                active_session = PomodoroSession.objects.filter(
+                    task__user=self.request.user,
+                    status='active'
+                ).select_related('task').first()
+            if timezone.localtime(sessions[-1].start_time).date() >= today:
+                today_stats = PomodoroSession.objects.filter(
+                    task__user=self.request.user,
+                    start_time__date=today,
+                    status='completed'
+                ).aggregate(
+                    focus_time=Coalesce(Sum('actual_duration'), 0),
+                    sessions_count=Count('id'),
+                )
         
         context.update({
             'available_tasks': available_tasks,
             'active_session': active_session,
             'recent_sessions': recent_sessions,
-            'today_focus_time': sum(s.actual_duration or 0 for s in today_sessions),
-            'today_sessions_count': today_sessions.count(),
+            'today_focus_time': today_stats['focus_time'],
+            'today_sessions_count': today_stats['sessions_count'],
         })
         
         return context
@@ -90,7 +117,7 @@ def start_pomodoro_session(request):
         if not task_id:
             return JsonResponse({'error': 'Task ID is required'}, status=400)
         
-        task = get_object_or_404(Task, id=task_id, user=request.user)
+        task = get_object_or_404(Task.objects.for_user(request.user), id=task_id)
         
         # Check if there's already an active session
         active_session = PomodoroSession.objects.filter(
@@ -118,7 +145,7 @@ def start_pomodoro_session(request):
         # Update task status to in_progress if it's not already
         if task.status == 'todo':
             task.status = 'in_progress'
-            task.save()
+            task.save(update_fields=['status', 'updated_at'])
         
         return JsonResponse({
             'success': True,
@@ -160,7 +187,7 @@ def complete_pomodoro_session(request):
         session.end_time = timezone.now()
         session.actual_duration = int(actual_minutes) if actual_minutes else session.planned_duration
         session.notes = notes
-        session.save()
+        session.save(update_fields=['status', 'end_time', 'actual_duration', 'notes'])
         
         # Update task's actual hours
         if session.session_type == 'focus':
@@ -169,7 +196,8 @@ def complete_pomodoro_session(request):
                 task.actual_hours = float(task.actual_hours) + (session.actual_duration / 60.0)
             else:
                 task.actual_hours = session.actual_duration / 60.0
-            task.save()
+            task.save(update_fields=['actual_hours', 'updated_at'])
+            _count_focus_session(request.user.id)
         
         return JsonResponse({
             'success': True,
@@ -204,7 +232,7 @@ def pause_pomodoro_session(request):
         )
         
         session.status = 'paused'
-        session.save()
+        session.save(update_fields=['status'])
         
         return JsonResponse({
             'success': True,
@@ -239,7 +267,7 @@ def cancel_pomodoro_session(request):
         
         session.status = 'cancelled'
         session.end_time = timezone.now()
-        session.save()
+        session.save(update_fields=['status', 'end_time'])
         
         return JsonResponse({
             'success': True,
@@ -250,28 +278,48 @@ def cancel_pomodoro_session(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 
+def _focus_count_key(user_id, day):
+    return f'pomodoro_focus:{user_id}:{day.isoformat()}'
+
+
+def _count_focus_session(user_id):
+    """Bump today's completed focus-session counter, if it is cached."""
+    if not cache_is_shared():
+        return
+    try:
+        cache.incr(_focus_count_key(user_id, timezone.now().date()))
+    except ValueError:
+        # Not cached yet; the next read seeds it from the database
+        pass
+
+
 def get_next_session_suggestion(completed_session):
     """Suggest what type of session to do next."""
-    user = completed_session.task.user
+    if completed_session.session_type != 'focus':
+        # After any break, suggest focus session
+        return {'type': 'focus', 'duration': 25, 'message': 'Ready to focus again?'}
     
-    # Count focus sessions today
+    # Count focus sessions today, from the cached counter when possible.
+    # A process-local counter would only see this worker's increments.
+    user_id = completed_session.task.user_id
     today = timezone.now().date()
-    today_focus_sessions = PomodoroSession.objects.filter(
-        task__user=user,
-        start_time__date=today,
-        session_type='focus',
-        status='completed'
-    ).count()
+    use_cache = cache_is_shared()
+    key = _focus_count_key(user_id, today)
+    today_focus_sessions = cache.get(key) if use_cache else None
+    if today_focus_sessions is None:
+        today_focus_sessions = PomodoroSession.objects.filter(
+            task__user_id=user_id,
+            start_time__date=today,
+            session_type='focus',
+            status='completed'
+        ).count()
+        if use_cache:
+            cache.add(key, today_focus_sessions, FOCUS_COUNT_TIMEOUT)
     
-    if completed_session.session_type == 'focus':
-        # After 4 focus sessions, suggest long break
-        if today_focus_sessions % 4 == 0:
-            return {'type': 'long_break', 'duration': 15, 'message': 'Time for a longer break!'}
-        else:
-            return {'type': 'short_break', 'duration': 5, 'message': 'Take a short break!'}
-    else:
-        # After any break, suggest focus session
-        return {'type': 'focus', 'duration': 25, 'message': 'Ready to focus again?'}
+    # After 4 focus sessions, suggest long break
+    if today_focus_sessions % 4 == 0:
+        return {'type': 'long_break', 'duration': 15, 'message': 'Time for a longer break!'}
+    return {'type': 'short_break', 'duration': 5, 'message': 'Take a short break!'}
 
 
 # Legacy Pomodoro functions for backward compatibility
@@ -286,12 +334,12 @@ def start_pomodoro(request):
         return JsonResponse({'error': 'Task ID required'}, status=400)
     
     try:
-        task = get_object_or_404(Task, id=task_id, user=request.user)
+        task = get_object_or_404(Task.objects.for_user(request.user), id=task_id)
         
         # Update task to in_progress if not already
         if task.status == 'todo':
             task.status = 'in_progress'
-            task.save()
+            task.save(update_fields=['status', 'updated_at'])
         
         return JsonResponse({
             'success': True,
@@ -312,20 +360,18 @@ def complete_pomodoro(request):
     if not task_id:
         return JsonResponse({'error': 'Task ID required'}, status=400)
     
-    try:
-        task = get_object_or_404(Task, id=task_id, user=request.user)
-        
-        # Create Pomodoro session record
-        now = timezone.now()
-        start_time = now - timedelta(minutes=25)
-        
-        PomodoroSession.objects.create(
-            task=task,
-            start_time=start_time,
-            end_time=now
-        )
-        
-        return JsonResponse({'success': True})
-    
-    except Task.DoesNotExist:
+    # Only the ownership check is needed; the session stores the FK id
+    if not Task.objects.for_user(request.user).filter(id=task_id).exists():
         return JsonResponse({'error': 'Task not found'}, status=404)
+    
+    # Create Pomodoro session record
+    now = timezone.now()
+    start_time = now - timedelta(minutes=25)
+    
+    PomodoroSession.objects.create(
+        task_id=task_id,
+        start_time=start_time,
+        end_time=now
+    )
+    
+    return JsonResponse({'success': True})
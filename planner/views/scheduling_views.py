@@ -5,11 +5,24 @@ from django.views.decorators.http import require_POST
 from django.contrib import messages
 from django.utils import timezone
 from django.db import transaction
+from django.core.cache import cache
+from django.urls import reverse
+from django_q.tasks import async_task
 import logging
 from datetime import datetime, timedelta
+from uuid import uuid4
 
-from ..models import Task
-from ..services.scheduling_engine import SchedulingEngine
+from ..caching import bump_schedule_version, cache_is_shared
+from ..models import Task, TaskNotification
+from ..services.scheduling_engine import (
+    REOPTIMIZE_STATUS_TIMEOUT,
+    get_scheduling_engine,
+    is_schedule_optimized,
+    reoptimize_schedule_task,
+    reoptimize_status_key,
+    reoptimize_week_status_key,
+    reoptimize_week_task,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -18,124 +31,111 @@ logger = logging.getLogger(__name__)
 @require_POST
 def update_task_schedule(request):
     """Update task schedule via AJAX."""
+    task_id = request.POST.get('task_id')
+    start_time_str = request.POST.get('start_time')
+    
+    if not task_id or not start_time_str:
+        return JsonResponse({'success': False, 'error': 'Missing required fields'}, status=400)
+    if not task_id.isdigit():
+        return JsonResponse({'success': False, 'error': 'Invalid task ID'}, status=400)
+    
+    user_tasks = Task.objects.for_user(request.user).filter(id=task_id)
+    
+    # Only the duration is needed to place the task
+    estimated_hours = user_tasks.values_list('estimated_hours', flat=True).first()
+    if estimated_hours is None:
+        return JsonResponse({'success': False, 'error': 'Task not found'}, status=404)
+    
+    # Parse start time; fromisoformat accepts the 'Z' suffix natively
     try:
-        task_id = request.POST.get('task_id')
-        start_time_str = request.POST.get('start_time')
-        
-        task = get_object_or_404(Task, id=task_id, user=request.user)
-        
-        # Parse start time
-        start_time = datetime.fromisoformat(start_time_str.replace('Z', '+00:00'))
-        if timezone.is_naive(start_time):
-            start_time = timezone.make_aware(start_time)
-        
-        # Calculate end time
-        duration = timedelta(hours=float(task.estimated_hours))
-        end_time = start_time + duration
-        
-        # Update task
-        task.start_time = start_time
-        task.end_time = end_time
-        task.is_locked = True
-        task.save()
-        
-        return JsonResponse({'success': True})
-        
-    except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)})
+        start_time = datetime.fromisoformat(start_time_str)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid datetime format'}, status=400)
+    if timezone.is_naive(start_time):
+        start_time = timezone.make_aware(start_time)
+    
+    # Calculate end time
+    duration = timedelta(hours=float(estimated_hours))
+    end_time = start_time + duration
+    
+    # Update task
+    user_tasks.update(
+        start_time=start_time,
+        end_time=end_time,
+        is_locked=True,
+        updated_at=timezone.now(),
+    )
+    
+    # update() skips the Task signals, so do their work here
+    bump_schedule_version(request.user.id)
+    async_task('planner.services.notification_service.refresh_task_reminders', int(task_id))
+    
+    return JsonResponse({'success': True})
 
 
 @login_required
 @require_POST
 def unschedule_task(request):
     """Remove task from schedule."""
-    try:
-        task_id = request.POST.get('task_id')
-        task = get_object_or_404(Task, id=task_id, user=request.user)
-        
-        task.start_time = None
-        task.end_time = None
-        task.is_locked = False
-        task.save()
-        
-        return JsonResponse({'success': True})
-        
-    except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)})
+    task_id = request.POST.get('task_id')
+    if not task_id:
+        return JsonResponse({'success': False, 'error': 'Missing required fields'}, status=400)
+    if not task_id.isdigit():
+        return JsonResponse({'success': False, 'error': 'Invalid task ID'}, status=400)
+    
+    updated = Task.objects.for_user(request.user).filter(id=task_id).update(
+        start_time=None,
+        end_time=None,
+        is_locked=False,
+        updated_at=timezone.now(),
+    )
+    if not updated:
+        return JsonResponse({'success': False, 'error': 'Task not found'}, status=404)
+    
+    # update() skips the pre_save hook that cancels reminders for unscheduled tasks
+    TaskNotification.objects.filter(task_id=task_id, status='pending').update(status='cancelled')
+    bump_schedule_version(request.user.id)
+    
+    return JsonResponse({'success': True})
 
 
 @login_required
 @require_POST
 def reoptimize_week(request):
-    """Re-optimize the schedule using the enhanced scheduling engine with optimization history tracking."""
-    try:
-        from ..models import OptimizationHistory
-        
-        # Create snapshot of current state before optimization
-        optimization_history = OptimizationHistory(user=request.user)
-        current_task_snapshot = optimization_history.create_task_snapshot(request.user)
-        
-        engine = SchedulingEngine(request.user)
-        
-        # Use the enhanced scheduling with analysis
-        result = engine.calculate_schedule_with_analysis()
-        
-        # Save optimization history
-        optimization_history.previous_task_state = current_task_snapshot
-        optimization_history.scheduled_count = len(result['scheduled_tasks'])
-        optimization_history.unscheduled_count = len(result['unscheduled_tasks'])
-        optimization_history.utilization_rate = result['utilization_rate']
-        optimization_history.total_hours_scheduled = result['total_scheduled_hours']
-        optimization_history.was_overloaded = result['overload_analysis']['is_overloaded']
-        
-        if result['overload_analysis']['is_overloaded']:
-            optimization_history.overload_ratio = result['overload_analysis']['overload_ratio']
-            optimization_history.excess_hours = result['overload_analysis']['excess_hours']
-            optimization_history.recommendations = result['overload_analysis']['recommendations']
-        
-        # Store optimization decisions for transparency
-        optimization_history.optimization_decisions = {
-            'algorithm_used': 'enhanced_priority_with_splitting',
-            'priority_factors': ['deadline_urgency', 'task_priority', 'estimated_hours'],
-            'task_splitting_enabled': True,
-            'overload_handling': 'priority_based_selection'
-        }
-        
-        optimization_history.save()
-        
-        # Send optimization notification
-        from ..services.notification_service import NotificationService
-        NotificationService.send_optimization_notification(
-            request.user,
-            f"Schedule optimization complete! {len(result['scheduled_tasks'])} tasks scheduled with {round(result['utilization_rate'], 1)}% utilization."
-        )
-        
-        # Save scheduled tasks
-        with transaction.atomic():
-            for task in result['scheduled_tasks']:
-                task.save()
-        
-        # Prepare response with analysis and undo option
-        response_data = {
-            'success': True,
-            'message': f'Schedule optimized! {len(result["scheduled_tasks"])} tasks scheduled.',
-            'scheduled_count': len(result['scheduled_tasks']),
-            'unscheduled_count': len(result['unscheduled_tasks']),
-            'utilization_rate': round(result['utilization_rate'], 1),
-            'overload_analysis': result['overload_analysis'],
-            'optimization_id': optimization_history.id,
-            'can_undo': True,  # Can undo for 1 hour
-        }
-        
-        # Add recommendations if overloaded
-        if result['overload_analysis']['is_overloaded']:
-            response_data['recommendations'] = result['overload_analysis']['recommendations']
-            response_data['message'] += f' Warning: Schedule overloaded by {result["overload_analysis"]["excess_hours"]:.1f} hours.'
-        
-        return JsonResponse(response_data)
-        
-    except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)})
+    """Start re-optimizing the schedule in the background and return a job id to poll."""
+    job_id = uuid4().hex
+    
+    # The cluster can only report back through a shared cache; otherwise
+    # optimize within the request and answer with the result directly
+    if not cache_is_shared():
+        try:
+            return JsonResponse(reoptimize_week_task(request.user.id, job_id))
+        except Exception as e:
+            logger.exception("Error re-optimizing week for user %s", request.user.id)
+            return JsonResponse({'state': 'failed', 'success': False, 'error': str(e)})
+    
+    cache.set(
+        reoptimize_week_status_key(request.user.id, job_id),
+        {'state': 'pending'},
+        REOPTIMIZE_STATUS_TIMEOUT,
+    )
+    async_task('planner.services.scheduling_engine.reoptimize_week_task', request.user.id, job_id)
+    
+    return JsonResponse({
+        'success': True,
+        'state': 'pending',
+        'task_id': job_id,
+        'status_url': reverse('planner:reoptimize_week_status', args=[job_id]),
+    })
+
+
+@login_required
+def reoptimize_week_status(request, task_id):
+    """Report the state of a background reoptimize_week job, with its result once complete."""
+    status = cache.get(reoptimize_week_status_key(request.user.id, task_id))
+    if status is None:
+        return JsonResponse({'state': 'unknown', 'success': False, 'error': 'Optimization not found'}, status=404)
+    return JsonResponse(status)
 
 
 @login_required
@@ -195,19 +195,41 @@ def undo_optimization(request):
 @login_required
 @require_POST
 def reoptimize_schedule(request):
-    """Re-optimize the user's schedule."""
-    engine = SchedulingEngine(request.user)
-    scheduled_tasks, unscheduled_tasks = engine.reschedule_week()
+    """Re-optimize the user's schedule in the background."""
+    if is_schedule_optimized(request.user.id):
+        messages.info(request, 'Your schedule is already optimized.')
+        return redirect('planner:calendar')
     
-    # Save scheduled tasks
-    with transaction.atomic():
-        for task in scheduled_tasks:
-            task.save()
+    job_id = uuid4().hex
+    
+    # As in reoptimize_week: without a shared cache the cluster can't report
+    # back, so optimize within the request and flash the result
+    if not cache_is_shared():
+        try:
+            status = reoptimize_schedule_task(request.user.id, job_id)
+        except Exception:
+            logger.exception("Error re-optimizing schedule for user %s", request.user.id)
+            messages.error(request, 'Failed to re-optimize your schedule. Please try again.')
+        else:
+            messages.success(request, status['message'])
+        return redirect('planner:calendar')
+    
+    cache.set(reoptimize_status_key(request.user.id, job_id), {'state': 'pending'}, REOPTIMIZE_STATUS_TIMEOUT)
+    async_task('planner.services.scheduling_engine.reoptimize_schedule_task', request.user.id, job_id)
     
-    messages.success(request, f'Schedule optimized! {len(scheduled_tasks)} tasks scheduled.')
+    messages.info(request, 'Re-optimizing your schedule in the background.')
     
-    # Return updated calendar view
-    return redirect('planner:calendar')
+    # The calendar polls reoptimize_schedule_status for this job and reloads when it finishes
+    return redirect(f"{reverse('planner:calendar')}?reoptimize_job={job_id}")
+
+
+@login_required
+def reoptimize_schedule_status(request, task_id):
+    """Report the state of a background reoptimize_schedule job, with its result once complete."""
+    status = cache.get(reoptimize_status_key(request.user.id, task_id))
+    if status is None:
+        return JsonResponse({'state': 'unknown', 'success': False, 'error': 'Optimization not found'}, status=404)
+    return JsonResponse(status)
 
 
 @login_required
@@ -215,15 +237,15 @@ def reoptimize_schedule(request):
 def auto_schedule_all_tasks(request):
     """Automatically schedule all unscheduled tasks."""
     try:
-        engine = SchedulingEngine(request.user)
+        engine = get_scheduling_engine(request)
         
         # Get all unscheduled tasks
-        unscheduled_tasks = request.user.tasks.filter(
+        unscheduled_tasks = list(request.user.tasks.filter(
             start_time__isnull=True,
             status__in=['todo', 'in_progress']
-        )
+        ))
         
-        if not unscheduled_tasks.exists():
+        if not unscheduled_tasks:
             return JsonResponse({
                 'success': True,
                 'message': 'No unscheduled tasks to schedule',
@@ -231,15 +253,13 @@ def auto_schedule_all_tasks(request):
             })
         
         # Use the scheduling engine to schedule only unscheduled tasks
-        result = engine.calculate_schedule_with_analysis(list(unscheduled_tasks))
+        result = engine.calculate_schedule_with_analysis(unscheduled_tasks)
         
         scheduled_count = len(result['scheduled_tasks'])
         unscheduled_count = len(result['unscheduled_tasks'])
         
         # Save scheduled tasks to database
-        with transaction.atomic():
-            for task in result['scheduled_tasks']:
-                task.save()
+        engine.save_schedule(result['scheduled_tasks'])
         
         return JsonResponse({
             'success': True,
@@ -262,35 +282,35 @@ def auto_schedule_all_tasks(request):
 @require_POST
 def quick_schedule_task(request):
     """Quick schedule a single task in the next available slot."""
-    try:
-        task_id = request.POST.get('task_id')
-        task = get_object_or_404(Task, id=task_id, user=request.user)
-        
-        engine = SchedulingEngine(request.user)
+    task_id = request.POST.get('task_id')
+    if task_id and not task_id.isdigit():
+        return JsonResponse({'success': False, 'error': 'Invalid task ID'}, status=400)
+    task = Task.objects.for_user(request.user).filter(id=task_id).first() if task_id else None
+    if task is None:
+        return JsonResponse({'success': False, 'error': 'Task not found'}, status=404)
+    
+    engine = get_scheduling_engine(request)
+    
+    # Use the new safe scheduling method to prevent overlaps
+    success = engine.schedule_single_task_safely(task)
+    
+    if success:
+        task.save(update_fields=['start_time', 'end_time', 'updated_at'])
         
-        # Use the new safe scheduling method to prevent overlaps
-        success = engine.schedule_single_task_safely(task)
+        # Convert to local timezone for display
+        local_start_time = timezone.localtime(task.start_time)
+        local_end_time = timezone.localtime(task.end_time)
         
-        if success:
-            task.save()
-            
-            # Convert to local timezone for display
-            local_start_time = timezone.localtime(task.start_time)
-            local_end_time = timezone.localtime(task.end_time)
-            
-            return JsonResponse({
-                'success': True,
-                'scheduled_time': f"{local_start_time.strftime('%b %d at %I:%M %p')} - {local_end_time.strftime('%I:%M %p')}",
-                'task_title': task.title
-            })
-        else:
-            return JsonResponse({
-                'success': False,
-                'error': 'No available time slots found for this task'
-            })
-            
-    except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)})
+        return JsonResponse({
+            'success': True,
+            'scheduled_time': f"{local_start_time.strftime('%b %d at %I:%M %p')} - {local_end_time.strftime('%I:%M %p')}",
+            'task_title': task.title
+        })
+    else:
+        return JsonResponse({
+            'success': False,
+            'error': 'No available time slots found for this task'
+        })
 
 
 @login_required
@@ -305,7 +325,7 @@ def schedule_urgent_tasks(request):
             deadline__lte=urgent_deadline,
             start_time__isnull=True,
             status__in=['todo', 'in_progress']
-        ).order_by('deadline', 'priority'))
+        ).only(*Task.SCHEDULING_FIELDS).order_by('deadline', 'priority'))
         
         if not urgent_tasks:
             return JsonResponse({
@@ -314,13 +334,11 @@ def schedule_urgent_tasks(request):
                 'message': 'No urgent tasks found'
             })
         
-        engine = SchedulingEngine(request.user)
+        engine = get_scheduling_engine(request)
         scheduled_tasks, unscheduled_tasks = engine.calculate_schedule(urgent_tasks)
         
         # Save scheduled tasks
-        with transaction.atomic():
-            for task in scheduled_tasks:
-                task.save()
+        engine.save_schedule(scheduled_tasks)
         
         return JsonResponse({
             'success': True,
@@ -348,20 +366,19 @@ def create_urgent_task(request):
             task.save()
             
             # Check if there's available time for this task
-            engine = SchedulingEngine(request.user)
-            available_slots = engine._generate_available_slots(list(request.user.time_blocks.all()))
-            
-            # Calculate total available time
-            total_available = sum(engine._slot_duration(slot) for slot in available_slots)
+            engine = get_scheduling_engine(request)
+            available_slots = engine._generate_available_slots(engine.time_blocks)
             required_time = float(task.estimated_hours)
             
-            if total_available >= required_time:
-                # Try to schedule normally
-                scheduled_slot = engine._find_suitable_slot(task, available_slots)
-                if scheduled_slot:
+            # Try to schedule normally; a partial slot is only taken when the
+            # week has room for the whole task, so the total is summed lazily
+            scheduled_slot = engine._find_suitable_slot(task, available_slots)
+            if scheduled_slot:
+                fits_whole_task = (scheduled_slot['end'] - scheduled_slot['start']) >= timedelta(hours=required_time)
+                if fits_whole_task or sum(engine._slot_duration(slot) for slot in available_slots) >= required_time:
                     task.start_time = scheduled_slot['start']
                     task.end_time = scheduled_slot['end']
-                    task.save()
+                    task.save(update_fields=['start_time', 'end_time', 'updated_at'])
                     
                     return JsonResponse({
                         'success': True,
@@ -376,7 +393,9 @@ def create_urgent_task(request):
                 end_time__isnull=False,
                 status__in=['todo', 'in_progress'],
                 is_locked=False
-            ).order_by('start_time')
+            ).order_by('start_time').values(
+                'id', 'title', 'start_time', 'end_time', 'estimated_hours', 'priority', 'is_locked'
+            )
             
             return JsonResponse({
                 'success': True,
@@ -386,13 +405,10 @@ def create_urgent_task(request):
                 'sacrifice_mode': True,
                 'conflicting_tasks': [
                     {
-                        'id': t.id,
-                        'title': t.title,
-                        'start_time': t.start_time.isoformat(),
-                        'end_time': t.end_time.isoformat(),
-                        'estimated_hours': float(t.estimated_hours),
-                        'priority': t.priority,
-                        'is_locked': t.is_locked
+                        **t,
+                        'start_time': t['start_time'].isoformat(),
+                        'end_time': t['end_time'].isoformat(),
+                        'estimated_hours': float(t['estimated_hours']),
                     } for t in conflicting_tasks
                 ]
             })
@@ -422,8 +438,8 @@ def sacrifice_tasks(request):
                 'error': 'Missing required parameters'
             })
         
-        urgent_task = get_object_or_404(Task, id=urgent_task_id, user=request.user)
-        target_time = datetime.fromisoformat(target_datetime.replace('Z', '+00:00'))
+        urgent_task = get_object_or_404(Task.objects.for_user(request.user), id=urgent_task_id)
+        target_time = datetime.fromisoformat(target_datetime)
         if timezone.is_naive(target_time):
             target_time = timezone.make_aware(target_time)
         
@@ -436,16 +452,20 @@ def sacrifice_tasks(request):
                     is_locked=False
                 )
                 
-                for task in sacrifice_tasks_qs:
-                    task.start_time = None
-                    task.end_time = None
-                    task.save()
+                # One UPDATE per table; QuerySet.update skips the pre_save hook,
+                # so cancel pending reminders here
+                TaskNotification.objects.filter(
+                    task__in=sacrifice_tasks_qs.filter(start_time__isnull=False),
+                    status='pending'
+                ).update(status='cancelled')
+                sacrifice_tasks_qs.update(start_time=None, end_time=None, updated_at=timezone.now())
+                bump_schedule_version(request.user.id)
             
             # Schedule the urgent task
             duration = timedelta(hours=float(urgent_task.estimated_hours))
             urgent_task.start_time = target_time
             urgent_task.end_time = target_time + duration
-            urgent_task.save()
+            urgent_task.save(update_fields=['start_time', 'end_time', 'updated_at'])
         
         return JsonResponse({
             'success': True,
@@ -461,7 +481,7 @@ def sacrifice_tasks(request):
 def check_overload(request):
     """Check if the current schedule would be overloaded and return overload information."""
     try:
-        engine = SchedulingEngine(request.user)
+        engine = get_scheduling_engine(request)
         
         # Get all unscheduled tasks
         unscheduled_tasks = list(request.user.tasks.filter(
@@ -476,7 +496,7 @@ def check_overload(request):
             })
         
         # Get available time blocks
-        time_blocks = list(request.user.time_blocks.all())
+        time_blocks = engine.time_blocks
         available_slots = engine._generate_available_slots(time_blocks)
         
         # Calculate total required vs available time
@@ -515,7 +535,7 @@ def check_overload(request):
 def compress_schedule(request):
     """Compress all task durations proportionally to fit within available time."""
     try:
-        engine = SchedulingEngine(request.user)
+        engine = get_scheduling_engine(request)
         
         # Get all unscheduled tasks
         unscheduled_tasks = list(request.user.tasks.filter(
@@ -530,7 +550,7 @@ def compress_schedule(request):
             })
         
         # Get available time blocks
-        time_blocks = list(request.user.time_blocks.all())
+        time_blocks = engine.time_blocks
         available_slots = engine._generate_available_slots(time_blocks)
         
         # Calculate compression ratio
@@ -552,15 +572,13 @@ def compress_schedule(request):
                 compressed_hours = round(original_hours * compression_ratio, 1)
                 # Ensure minimum task duration of 0.5 hours
                 task.estimated_hours = max(compressed_hours, 0.5)
-                task.save()
+                task.save(update_fields=['estimated_hours', 'updated_at'])
         
         # Now schedule the compressed tasks
         scheduled_tasks, remaining_unscheduled = engine.calculate_schedule(unscheduled_tasks)
         
         # Save scheduled tasks
-        with transaction.atomic():
-            for task in scheduled_tasks:
-                task.save()
+        engine.save_schedule(scheduled_tasks)
         
         return JsonResponse({
             'success': True,
@@ -581,7 +599,7 @@ def compress_schedule(request):
 def prioritize_schedule(request):
     """Schedule tasks based on priority and deadline, leaving distant-deadline tasks unscheduled."""
     try:
-        engine = SchedulingEngine(request.user)
+        engine = get_scheduling_engine(request)
         
         # Get all unscheduled tasks
         unscheduled_tasks = list(request.user.tasks.filter(
@@ -606,7 +624,7 @@ def prioritize_schedule(request):
         sorted_tasks = sorted(unscheduled_tasks, key=calculate_priority_score)
         
         # Get available time blocks
-        time_blocks = list(request.user.time_blocks.all())
+        time_blocks = engine.time_blocks
         available_slots = engine._generate_available_slots(time_blocks)
         total_available_hours = sum(engine._slot_duration(slot) for slot in available_slots)
         
@@ -630,9 +648,7 @@ def prioritize_schedule(request):
             scheduled_tasks, unscheduled_tasks = engine.calculate_schedule(remaining_tasks)
             
             # Save scheduled tasks
-            with transaction.atomic():
-                for task in scheduled_tasks:
-                    task.save()
+            engine.save_schedule(scheduled_tasks)
         
         # Count tasks left unscheduled due to prioritization
         skipped_tasks = len(sorted_tasks) - len(remaining_tasks)
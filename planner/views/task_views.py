@@ -10,18 +10,22 @@ from django.views.decorators.csrf import csrf_exempt
 from django.contrib import messages
 from django.utils import timezone
 from django.db import transaction
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 import json
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 from django.db.models import Q
 
+from ..caching import bump_schedule_version, cache_is_shared, get_schedule_version
 from ..models import Task, TimeBlock, PomodoroSession, NotificationPreference
 from ..forms import TaskForm, QuickTaskForm, TimeBlockForm
-from ..services.scheduling_engine import SchedulingEngine
+from ..services.scheduling_engine import get_scheduling_engine
 
 logger = logging.getLogger(__name__)
 
+PAGE_CACHE_TIMEOUT = 60 * 5
+
 
 class OnboardingView(LoginRequiredMixin, TemplateView):
     """Quick-start onboarding for new users."""
@@ -35,20 +39,23 @@ class OnboardingView(LoginRequiredMixin, TemplateView):
     def post(self, request, *args, **kwargs):
         form = QuickTaskForm(request.POST)
         if form.is_valid():
-            task = form.save(commit=False)
-            task.user = request.user
-            task.save()
+            # Task, availability and schedule are committed together
+            with transaction.atomic():
+                task = form.save(commit=False)
+                task.user = request.user
+                task.save()
 
-            # Create default availability for new users
-            self._create_default_availability(request.user)
+                # Create default availability for new users
+                self._create_default_availability(request.user)
 
-            # Try to schedule the task
-            engine = SchedulingEngine(request.user)
-            scheduled_tasks, unscheduled_tasks = engine.calculate_schedule([task])
+                # Try to schedule the task
+                engine = get_scheduling_engine(request)
+                scheduled_tasks, unscheduled_tasks = engine.calculate_schedule([task])
 
-            if scheduled_tasks:
                 for scheduled_task in scheduled_tasks:
                     scheduled_task.save()
+
+            if scheduled_tasks:
                 messages.success(request, f'Great! Your task "{task.title}" has been scheduled. Add more availability to build a complete schedule.')
             else:
                 messages.warning(request, f'Task "{task.title}" was created but couldn\'t be scheduled. Please add your availability.')
@@ -59,21 +66,23 @@ class OnboardingView(LoginRequiredMixin, TemplateView):
 
     def _create_default_availability(self, user):
         """Create some default availability for new users."""
-        now = timezone.now()
-        today = now.date()
-        
-        # Create availability for next 7 days, 9 AM to 5 PM
-        for i in range(7):
-            day = today + timedelta(days=i)
-            start_time = timezone.make_aware(datetime.combine(day, datetime.min.time().replace(hour=9)))
-            end_time = timezone.make_aware(datetime.combine(day, datetime.min.time().replace(hour=17)))
-            
-            TimeBlock.objects.create(
+        today = timezone.now().date()
+        tz = timezone.get_current_timezone()
+        day_start = time(hour=9)
+        day_end = time(hour=17)
+        
+        # Create availability for next 7 days, 9 AM to 5 PM in a single INSERT
+        days = [today + timedelta(days=i) for i in range(7)]
+        TimeBlock.objects.bulk_create([
+            TimeBlock(
                 user=user,
-                start_time=start_time,
-                end_time=end_time,
+                start_time=datetime.combine(day, day_start, tzinfo=tz),
+                end_time=datetime.combine(day, day_end, tzinfo=tz),
                 is_recurring=False
             )
+            for day in days
+        ])
+        bump_schedule_version(user.id)
 
 
 class DashboardView(LoginRequiredMixin, TemplateView):
@@ -82,10 +91,25 @@ class DashboardView(LoginRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        context.update(self._get_stats())
+        return context
+
+    def _get_stats(self):
+        """
+        Return the dashboard counters and recent tasks, cached per user and
+        schedule version (when the cache is shared) so repeat visits skip the
+        count queries.
+        """
+        user = self.request.user
+        use_cache = cache_is_shared()
+        if use_cache:
+            cache_key = f'dashboard:{user.id}:{get_schedule_version(user.id)}'
+            stats = cache.get(cache_key)
+            if stats is not None:
+                return stats
         
         # Get user's tasks and calculate stats
-        user_tasks = self.request.user.tasks.all()
-        today = timezone.now().date()
+        user_tasks = user.tasks.all()
         
         # Calculate task status counts
         total_tasks = user_tasks.count()
@@ -101,13 +125,13 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         ).count()
         
         # Recent tasks (last 10 updated)
-        recent_tasks = user_tasks.order_by('-updated_at')[:10]
+        recent_tasks = list(user_tasks.order_by('-updated_at')[:10])
         
         # Schedule overview stats
         scheduled_tasks_count = user_tasks.filter(start_time__isnull=False).count()
         unscheduled_tasks_count = user_tasks.filter(start_time__isnull=True, status__in=['todo', 'in_progress']).count()
         
-        context.update({
+        stats = {
             'total_tasks': total_tasks,
             'completed_tasks_count': completed_tasks_count,
             'in_progress_tasks_count': in_progress_tasks_count,
@@ -116,17 +140,21 @@ class DashboardView(LoginRequiredMixin, TemplateView):
             'urgent_tasks_count': urgent_tasks_count,
             'scheduled_tasks_count': scheduled_tasks_count,
             'unscheduled_tasks_count': unscheduled_tasks_count,
-        })
-        
-        return context
+            'time_blocks_count': user.time_blocks.count(),
+        }
+        if use_cache:
+            cache.set(cache_key, stats, PAGE_CACHE_TIMEOUT)
+        return stats
 
     def get(self, request, *args, **kwargs):
-        # Check if user is new (no tasks)
-        if not request.user.tasks.exists():
+        context = self.get_context_data()
+        
+        # New users (no tasks) go to onboarding; reuses the cached task count
+        if not context['total_tasks']:
             return redirect('planner:onboarding')
         
         # Render dashboard instead of redirecting to kanban
-        return self.render_to_response(self.get_context_data())
+        return self.render_to_response(context)
 
 
 class KanbanView(LoginRequiredMixin, TemplateView):
@@ -135,15 +163,35 @@ class KanbanView(LoginRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        user_tasks = self.request.user.tasks.all()
         
-        context['todo_tasks'] = user_tasks.filter(status='todo')
-        context['in_progress_tasks'] = user_tasks.filter(status='in_progress')
-        context['completed_tasks'] = user_tasks.filter(status='completed')
+        buckets = self._get_columns()
+        
+        context['todo_tasks'] = buckets['todo']
+        context['in_progress_tasks'] = buckets['in_progress']
+        context['completed_tasks'] = buckets['completed']
         context['task_form'] = TaskForm()
         
         return context
 
+    def _get_columns(self):
+        """Return the board's tasks bucketed by status, cached per schedule version when the cache is shared."""
+        user = self.request.user
+        use_cache = cache_is_shared()
+        if use_cache:
+            cache_key = f'kanban:{user.id}:{get_schedule_version(user.id)}'
+            buckets = cache.get(cache_key)
+            if buckets is not None:
+                return buckets
+        
+        # Fetch every card in one query and bucket by status in Python
+        buckets = {'todo': [], 'in_progress': [], 'completed': []}
+        for task in user.tasks.only(*Task.CARD_FIELDS):
+            buckets.setdefault(task.status, []).append(task)
+        
+        if use_cache:
+            cache.set(cache_key, buckets, PAGE_CACHE_TIMEOUT)
+        return buckets
+
 
 class TaskListView(LoginRequiredMixin, ListView):
     """List view of all user tasks."""
@@ -153,7 +201,7 @@ class TaskListView(LoginRequiredMixin, ListView):
     paginate_by = 20
 
     def get_queryset(self):
-        queryset = Task.objects.filter(user=self.request.user)
+        queryset = Task.objects.for_user(self.request.user).only(*Task.LIST_FIELDS)
         
         # Get filter parameters from GET request
         search = self.request.GET.get('search', '')
@@ -178,8 +226,9 @@ class TaskListView(LoginRequiredMixin, ListView):
             except (ValueError, TypeError):
                 pass  # Ignore invalid priority values
         
-        # Default ordering by priority (highest first) then by deadline
-        return queryset.order_by('-priority', 'deadline')
+        # Default ordering by priority (highest first) then by deadline;
+        # id keeps page boundaries stable between tasks with equal keys
+        return queryset.order_by('-priority', 'deadline', 'id')
 
 
 class TaskCreateView(LoginRequiredMixin, CreateView):
@@ -205,7 +254,7 @@ class TaskDetailView(LoginRequiredMixin, DetailView):
     template_name = 'planner/task_detail.html'
 
     def get_queryset(self):
-        return Task.objects.filter(user=self.request.user)
+        return Task.objects.for_user(self.request.user)
 
 
 class TaskUpdateView(LoginRequiredMixin, UpdateView):
@@ -215,7 +264,7 @@ class TaskUpdateView(LoginRequiredMixin, UpdateView):
     template_name = 'planner/task_form.html'
 
     def get_queryset(self):
-        return Task.objects.filter(user=self.request.user)
+        return Task.objects.for_user(self.request.user)
 
     def get_success_url(self):
         return reverse('planner:task_detail', kwargs={'pk': self.object.pk})
@@ -228,7 +277,7 @@ class TaskDeleteView(LoginRequiredMixin, DeleteView):
     success_url = reverse_lazy('planner:kanban')
 
     def get_queryset(self):
-        return Task.objects.filter(user=self.request.user)
+        return Task.objects.for_user(self.request.user)
 
 
 @login_required
@@ -242,9 +291,8 @@ def bulk_delete_tasks(request):
         
         # Convert to integers and filter by user
         task_ids = [int(id) for id in task_ids]
-        deleted_count = Task.objects.filter(
-            id__in=task_ids,
-            user=request.user
+        deleted_count = Task.objects.for_user(request.user).filter(
+            id__in=task_ids
         ).delete()[0]
         
         return JsonResponse({
@@ -265,8 +313,7 @@ def bulk_delete_tasks(request):
 def delete_completed_tasks(request):
     """Delete all completed tasks for the user."""
     try:
-        deleted_count = Task.objects.filter(
-            user=request.user,
+        deleted_count = Task.objects.for_user(request.user).filter(
             status='completed'
         ).delete()[0]
         
@@ -416,4 +463,4 @@ class ProfileView(LoginRequiredMixin, TemplateView):
     success_url = reverse_lazy('planner:kanban')
 
     def get_queryset(self):
-        return Task.objects.filter(user=self.request.user)
+        return Task.objects.for_user(self.request.user)